@@ -0,0 +1,38 @@
+"""
+Compare the cost of calling a MetaConditional-gated method with and without
+the cached condition.
+"""
+
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyarchy.events import Event
+
+
+class UncachedEvent(Event):
+
+    def execute(self):
+        pass
+
+
+class CachedEvent(Event):
+
+    _cache_condition = True
+
+    def execute(self):
+        pass
+
+
+def main(number = 1000000):
+    for cls in (UncachedEvent, CachedEvent):
+        event = cls()
+        elapsed = timeit.timeit(event.execute, number = number)
+        print('%-14s %8.1f ns/call' % (cls.__name__, elapsed / number * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare sending events between processes over an EventBus against pickling
+them one at a time through a multiprocessing.Queue.
+"""
+
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyarchy.events import Event, EventBus, EventBusListener
+
+
+class Ping(Event):
+
+    _name = 'ping'
+
+    def __init__(self, n = 0):
+        Event.__init__(self)
+        self.n = n
+
+
+Event.handler(Ping)
+
+
+def produce_bus(path, count):
+    with EventBus.connect(path) as bus:
+        for n in range(count):
+            bus.publish(Ping(n), n)
+
+
+def produce_queue(queue, count):
+    for n in range(count):
+        event = Ping(n)
+        queue.put((event.name, (n,), event.id, event.timestamp))
+
+    queue.put(None)
+
+
+def bench_bus(count):
+    path = os.path.join(tempfile.mkdtemp(), 'bus.sock')
+    received = 0
+
+    with EventBusListener(path) as listener:
+        start = time.perf_counter()
+        proc = multiprocessing.Process(target = produce_bus,
+                                       args = (path, count))
+        proc.start()
+
+        bus = listener.accept()
+        while True:
+            events = bus.receive()
+            if events is None:
+                break
+
+            received += len(events)
+
+        elapsed = time.perf_counter() - start
+        proc.join()
+
+    assert received == count
+    return count / elapsed
+
+
+def bench_queue(count):
+    queue = multiprocessing.Queue(maxsize = 4096)
+    received = 0
+
+    start = time.perf_counter()
+    proc = multiprocessing.Process(target = produce_queue,
+                                   args = (queue, count))
+    proc.start()
+
+    while True:
+        record = queue.get()
+        if record is None:
+            break
+
+        name, args, id_, timestamp = record
+        event = Event._handlers[name](*args)
+        event._restore_id(id_)
+        event._restore_timestamp(timestamp)
+        received += 1
+
+    elapsed = time.perf_counter() - start
+    proc.join()
+
+    assert received == count
+    return count / elapsed
+
+
+def main(count = 100000):
+    print('%-24s %12.0f events/s' % ('multiprocessing.Queue',
+                                     bench_queue(count)))
+    print('%-24s %12.0f events/s' % ('EventBus', bench_bus(count)))
+
+
+if __name__ == '__main__':
+    main()
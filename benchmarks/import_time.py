@@ -0,0 +1,68 @@
+"""
+Measure the import time of pyarchy and its submodules with -X importtime.
+
+Run with --max-us to exit with an error if any import is slower than the
+given number of microseconds, e.g. to catch regressions in CI.
+"""
+
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+MODULES = [
+    'pyarchy',
+    'pyarchy.core',
+    'pyarchy.data',
+    'pyarchy.events',
+    'pyarchy.mechanical',
+]
+
+
+def import_time(module: str, runs: int = 5) -> int:
+    """
+    Return the best cumulative import time of a module, in microseconds, in
+    a fresh interpreter.
+    """
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    env = dict(os.environ, PYTHONPATH = root)
+    best = None
+
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+            env = env,
+            stderr = subprocess.PIPE,
+            universal_newlines = True,
+            check = True)
+
+        for line in proc.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                cumulative = int(fields[1])
+                if best is None or cumulative < best:
+                    best = cumulative
+
+    return best
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__.strip())
+    parser.add_argument('--runs', type = int, default = 5)
+    parser.add_argument('--max-us', type = int, default = None)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in MODULES:
+        us = import_time(module, args.runs)
+        slow = args.max_us is not None and us > args.max_us
+        failed = failed or slow
+        print('%-24s %8i us%s' % (module, us, ' (too slow)' if slow else ''))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
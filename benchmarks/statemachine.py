@@ -0,0 +1,47 @@
+"""
+Measure StateMachine transition throughput for single and batched firing.
+"""
+
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyarchy.mechanical import StateMachine, Transition
+
+
+class Light(StateMachine):
+
+    states = ('red', 'green', 'yellow')
+    transitions = (
+        Transition('next', 'red', 'green'),
+        Transition('next', 'green', 'yellow'),
+        Transition('next', 'yellow', 'red'),
+        Transition('stop', '*', 'red'),
+        Transition('go', 'red', 'green'),
+    )
+
+
+def report(label, transitions, elapsed):
+    print('%-24s %12.0f transitions/s' % (label, transitions / elapsed))
+
+
+def main(size = 100000, number = 5):
+    light = Light()
+    report('fire', size * number,
+           timeit.timeit(lambda: light.fire('next'), number = size * number))
+
+    lights = [Light() for _ in range(size)]
+    report('fire_batch', size * number,
+           timeit.timeit(lambda: Light.fire_batch(lights, 'next'),
+                         number = number))
+
+    light.state = 'yellow'
+    report('fire (rejected)', size * number,
+           timeit.timeit(lambda: light.fire('go'), number = size * number))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare bulk switch operations on a SwitchBank against lists of switches.
+"""
+
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyarchy.mechanical import BinarySwitch, RotarySwitch, SwitchBank
+
+
+def report(label, elapsed, number):
+    print('%-32s %10.3f ms/op' % (label, elapsed / number * 1e3))
+
+
+def main(size = 100000, number = 10):
+    switches = [BinarySwitch() for _ in range(size)]
+    bank = SwitchBank(BinarySwitch, size)
+    mask = bytes(i % 2 for i in range(size))
+
+    def toggle_list():
+        for s, m in zip(switches, mask):
+            if m:
+                s.toggle()
+
+    report('BinarySwitch list toggle(mask)',
+           timeit.timeit(toggle_list, number = number), number)
+    report('SwitchBank toggle(mask)',
+           timeit.timeit(lambda: bank.toggle(mask), number = number), number)
+
+    rotaries = [RotarySwitch(9, wrapping = True) for _ in range(size)]
+    rotary_bank = SwitchBank(RotarySwitch, size, 9, wrapping = True)
+
+    def advance_list():
+        for r in rotaries:
+            r.state += 1
+
+    report('RotarySwitch list advance',
+           timeit.timeit(advance_list, number = number), number)
+    report('SwitchBank advance',
+           timeit.timeit(rotary_bank.advance, number = number), number)
+
+    indices = range(0, size, 3)
+    report('SwitchBank advance(indices)',
+           timeit.timeit(lambda: rotary_bank.advance(indices), number = number),
+           number)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,19 +12,22 @@ __all__ = [
     'events',
     'mechanical',
     'meta',
+    'profiling',
     'utils',
 ]
 
-try:
-    import os
-    import sys
 
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+def __getattr__(name):
+    """
+    Import submodules on first access.
+    """
+    if name in __all__:
+        import importlib
+        return importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError(
+            'module %r has no attribute %r' % (__name__, name))
 
-    for module in __all__:
-        __import__('pyarchy.' + module)
 
-    del os
-    del sys
-except NameError:
-    pass
+def __dir__():
+    return sorted(list(globals()) + __all__)
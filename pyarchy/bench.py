@@ -0,0 +1,351 @@
+"""
+Benchmarks of pyarchy's hot paths. Run with python -m pyarchy.bench.
+
+Each benchmark is run at every size, reporting the best ops/sec over a number
+of repeats and the peak memory allocated by one run. Results can be saved as
+a JSON baseline, and compared against a previous baseline to flag
+regressions.
+"""
+
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from . import __version__
+from .common import ClassicObject
+from .core import IdentifiedObject
+from .data import HardKeySet, ItemPool
+from .events import Event, EventPool
+from .mechanical import BinarySwitch, StateMachine, Transition
+from .utils import make_deep_copy, StrictArg
+
+
+_benchmarks = {}
+
+
+def benchmark(name: str):
+    """
+    Register a benchmark. The decorated function is called with a size, and
+    returns the number of operations and a function which performs them.
+    """
+    def decorator(setup):
+        _benchmarks[name] = setup
+        return setup
+
+    return decorator
+
+
+class BenchEvent(Event):
+
+    _name = 'bench'
+
+
+class BenchLight(StateMachine):
+
+    states = ('red', 'green', 'yellow')
+    transitions = (
+        Transition('next', 'red', 'green'),
+        Transition('next', 'green', 'yellow'),
+        Transition('next', 'yellow', 'red'),
+    )
+
+
+@benchmark('ItemPool.add')
+def bench_itempool_add(size):
+    objs = [ClassicObject('obj') for _ in range(size)]
+    pool = ItemPool()
+
+    def run():
+        for o in objs:
+            pool.add(o)
+
+    return size, run
+
+
+@benchmark('ItemPool.get')
+def bench_itempool_get(size):
+    objs = [ClassicObject('obj') for _ in range(size)]
+    pool = ItemPool(*objs)
+    ids = [o.id for o in objs[::max(1, size // 10)]]
+
+    def run():
+        for id_ in ids:
+            pool.get(id = id_)
+
+    return len(ids), run
+
+
+@benchmark('ItemPool.filter')
+def bench_itempool_filter(size):
+    pool = ItemPool(*(ClassicObject('obj') for _ in range(size)))
+
+    def run():
+        pool.filter(lambda o: o.id < '8')
+
+    return 1, run
+
+
+@benchmark('ItemPool.pop')
+def bench_itempool_pop(size):
+    pool = ItemPool(*(ClassicObject('obj') for _ in range(size)))
+    n = min(size, 1000)
+
+    def run():
+        for _ in range(n):
+            pool.pop()
+
+    return n, run
+
+
+@benchmark('ItemPool.__iter__')
+def bench_itempool_iter(size):
+    pool = ItemPool(*(ClassicObject('obj') for _ in range(size)))
+
+    def run():
+        for o in pool:
+            pass
+
+    return size, run
+
+
+@benchmark('EventPool.__iter__')
+def bench_eventpool_iter(size):
+    pool = EventPool('bench', *(BenchEvent() for _ in range(size)))
+
+    def run():
+        for e in pool:
+            pass
+
+    return size, run
+
+
+@benchmark('EventPool.create')
+def bench_eventpool_create(size):
+    pool = EventPool('bench')
+    name = BenchEvent.name
+
+    def run():
+        # The handler is registered only while the benchmark runs, and any
+        # handler of the same name is restored afterwards.
+        previous = Event._handlers.get(name)
+        Event.handler(BenchEvent)
+        try:
+            for _ in range(size):
+                pool.create(name, ())
+        finally:
+            if previous is None:
+                del Event._handlers[name]
+            else:
+                Event._handlers[name] = previous
+
+    return size, run
+
+
+@benchmark('HardKeySet.__setitem__')
+def bench_hardkeyset_set(size):
+    keys = [[i] for i in range(size)]
+    keyset = HardKeySet()
+
+    def run():
+        for k in keys:
+            keyset[k] = k
+
+    return size, run
+
+
+@benchmark('HardKeySet.__getitem__')
+def bench_hardkeyset_get(size):
+    keys = [[i] for i in range(size)]
+    keyset = HardKeySet()
+    for k in keys:
+        keyset[k] = k
+
+    def run():
+        for k in keys:
+            keyset[k]
+
+    return size, run
+
+
+@benchmark('make_deep_copy')
+def bench_make_deep_copy(size):
+    obj = {'name': 'obj', 'values': list(range(10)), 'nested': {'a': [1, 2]}}
+
+    def run():
+        make_deep_copy(obj, size)
+
+    return size, run
+
+
+@benchmark('Identity')
+def bench_identity(size):
+    def run():
+        for _ in range(size):
+            IdentifiedObject()
+
+    return size, run
+
+
+@benchmark('StrictArg')
+def bench_strictarg(size):
+    @StrictArg('value', int)
+    def func(value):
+        return value
+
+    def run():
+        for i in range(size):
+            func(i)
+
+    return size, run
+
+
+@benchmark('StateObject.state')
+def bench_stateobject(size):
+    switch = BinarySwitch()
+
+    def run():
+        for _ in range(size):
+            switch.toggle()
+
+    return size, run
+
+
+@benchmark('StateMachine.fire')
+def bench_statemachine(size):
+    light = BenchLight()
+
+    def run():
+        for _ in range(size):
+            light.fire('next')
+
+    return size, run
+
+
+def measure(name: str, size: int, repeat: int = 3) -> dict:
+    """
+    Run a benchmark at a size and return its ops/sec and peak memory.
+    """
+    setup = _benchmarks[name]
+    best = None
+
+    for _ in range(repeat):
+        ops, run = setup(size)
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    ops, run = setup(size)
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ops_per_sec': ops / best if best else float('inf'),
+        'peak_bytes': peak,
+    }
+
+
+def run_all(sizes: list, repeat: int = 3, match: str = None) -> dict:
+    """
+    Run every benchmark whose name contains match at each size.
+    """
+    results = {}
+    for name in _benchmarks:
+        if match and match not in name:
+            continue
+
+        for size in sizes:
+            results['%s[%i]' % (name, size)] = measure(name, size, repeat)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Return the names of the results more than threshold (a fraction) slower
+    than the baseline.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key in baseline:
+            old = baseline[key]['ops_per_sec']
+            if result['ops_per_sec'] < old * (1 - threshold):
+                regressions.append(key)
+
+    return regressions
+
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog = 'python -m pyarchy.bench',
+        description = 'Benchmark pyarchy hot paths.')
+    parser.add_argument('-s', '--sizes', type = int, nargs = '+',
+                        default = [100, 1000, 10000])
+    parser.add_argument('-r', '--repeat', type = int, default = 3)
+    parser.add_argument('-k', '--match', default = None,
+                        help = 'only run benchmarks whose name contains this')
+    parser.add_argument('--save', metavar = 'FILE',
+                        help = 'save the results as a JSON baseline')
+    parser.add_argument('--compare', metavar = 'FILE',
+                        help = 'compare the results with a JSON baseline')
+    parser.add_argument('--threshold', type = float, default = 0.1,
+                        help = 'fraction slower than the baseline that is '
+                               'flagged as a regression (default 0.1)')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    results = run_all(args.sizes, args.repeat, args.match)
+    regressions = compare(results, baseline, args.threshold)
+
+    print('%-32s %14s %12s %9s' % ('benchmark', 'ops/sec', 'peak KiB',
+                                   'change'))
+    for key, result in results.items():
+        if key in baseline:
+            change = '%+8.1f%%' % (
+                100 * (result['ops_per_sec'] / baseline[key]['ops_per_sec']
+                       - 1))
+        else:
+            change = ''
+
+        print('%-32s %14.0f %12.1f %9s%s' % (
+            key,
+            result['ops_per_sec'],
+            result['peak_bytes'] / 1024,
+            change,
+            ' REGRESSION' if key in regressions else ''))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'pyarchy': __version__,
+                'python': platform.python_version(),
+                'results': results,
+            }, f, indent = 2, sort_keys = True)
+
+    return 1 if regressions else 0
+
+
+__all__ = [
+    benchmark,
+    measure,
+    run_all,
+    compare,
+    main,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,7 @@ Container for some common Object types.
 """
 
 
+import itertools
 import time
 
 from .core import Object, IdentifiedObject, NamedObject
@@ -11,11 +12,19 @@ from .core import Object, IdentifiedObject, NamedObject
 class TimedObject(Object):
     """
     An Object requiring a timstamp at instantiation.
+
+    The timestamp is taken from the _clock function, which subclasses may
+    replace with an integer clock such as time.monotonic_ns or time.time_ns.
+    Objects stamped with the same time are ordered by their sequence number.
     """
 
+    _clock = staticmethod(time.time)
+    __sequence = itertools.count()
+
     def __init__(self):
         Object.__init__(self)
-        self.__timestamp = time.time()
+        self.__timestamp = self._clock()
+        self.__sequence_number = next(TimedObject.__sequence)
 
     def __str__(self):
         return str(self.__timestamp)
@@ -25,18 +34,49 @@ class TimedObject(Object):
 
     def __lt__(self, obj):
         if isinstance(obj, TimedObject):
-            return self.timestamp < obj.timestamp
+            return self.time_key < obj.time_key
         else:
             # Don't support comparisions with other types.
             return NotImplemented
 
     def __gt__(self, obj):
         if isinstance(obj, TimedObject):
-            return self.timestamp > obj.timestamp
+            return self.time_key > obj.time_key
         else:
             # Don't support comparisions with other types.
             return NotImplemented
 
+    def _recycle(self):
+        """
+        Stamp a reused object with the current time.
+        """
+        self.__timestamp = self._clock()
+        self.__sequence_number = next(TimedObject.__sequence)
+
+    def _restore_timestamp(self, timestamp, sequence: int = None):
+        """
+        Replace the timestamp of an object rebuilt from a serialized copy.
+        The object is sequenced as if it were created now, unless given a
+        sequence number reserved by _reserve_sequence.
+        """
+        self.__timestamp = timestamp
+        if sequence is None:
+            self.__sequence_number = next(TimedObject.__sequence)
+        else:
+            self.__sequence_number = sequence
+
+    @staticmethod
+    def _reserve_sequence(n: int) -> int:
+        """
+        Reserve n consecutive sequence numbers and return the first.
+        """
+        if n < 1:
+            return 0
+
+        # One call into islice, so no other object is sequenced in between.
+        return next(itertools.islice(TimedObject.__sequence, n - 1, None)) \
+            - (n - 1)
+
     @property
     def timestamp(self):
         """
@@ -44,6 +84,28 @@ class TimedObject(Object):
         """
         return self.__timestamp
 
+    @property
+    def sequence(self) -> int:
+        """
+        A number representing the order in which objects were stamped.
+        """
+        return self.__sequence_number
+
+    @property
+    def time_key(self) -> tuple:
+        """
+        A (timestamp, sequence) pair which orders objects by their creation.
+        """
+        return (self.__timestamp, self.__sequence_number)
+
+
+class MonotonicTimedObject(TimedObject):
+    """
+    A TimedObject stamped with integer nanoseconds from the monotonic clock.
+    """
+
+    _clock = staticmethod(time.monotonic_ns)
+
 
 class StrictlyNamedObject(Object):
     """
@@ -78,9 +140,17 @@ class ClassicObject(IdentifiedObject, TimedObject, StrictlyNamedObject):
     def __repr__(self):
         return "ClassicObject('%s')" % self.name
 
+    def _recycle(self):
+        """
+        Reset the ID and timestamp of a reused object.
+        """
+        IdentifiedObject._recycle(self)
+        TimedObject._recycle(self)
+
 
 __all__ = [
     TimedObject,
+    MonotonicTimedObject,
     StrictlyNamedObject,
     ClassicObject,
 ]
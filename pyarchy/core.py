@@ -3,11 +3,10 @@ Container for the most basic Object types.
 """
 
 
-import re
+import _thread
 import types
-import uuid
 
-from .meta import MetaNamedObject, MetaSingleton, MetaConditional
+from .meta import MetaNamedObject, MetaSingleton, MetaMultiton, MetaConditional
 from .utils import StrictArg
 
 
@@ -23,18 +22,52 @@ class Object(object):
         return self.__class__.__name__ + '()'
 
 
-class Identity(Object, uuid.UUID):
+_identity_lock = _thread.allocate_lock()
+
+
+def _identity_type() -> type:
     """
-    A UUID Object.
+    Return the Identity class, creating it on first use so that uuid is only
+    imported when an ID is needed.
     """
+    global Identity
 
-    def __init__(self, hex_ = None):
-        Object.__init__(self)
+    try:
+        return Identity
+    except NameError:
+        pass
 
-        if hex_ is None:
-            uuid.UUID.__init__(self, uuid.uuid4().hex)
-        else:
-            uuid.UUID.__init__(self, hex_)
+    # Only one class may be created, or objects holding IDs of another would
+    # fail isinstance checks and could not be pickled.
+    with _identity_lock:
+        if 'Identity' in globals():
+            return Identity
+
+        import uuid
+
+        class Identity(Object, uuid.UUID):
+            """
+            A UUID Object.
+            """
+
+            def __init__(self, hex_ = None):
+                Object.__init__(self)
+
+                if hex_ is None:
+                    uuid.UUID.__init__(self, uuid.uuid4().hex)
+                else:
+                    uuid.UUID.__init__(self, hex_)
+
+        Identity.__qualname__ = 'Identity'
+        return Identity
+
+
+def __getattr__(name):
+    if name == 'Identity':
+        return _identity_type()
+    else:
+        raise AttributeError(
+            'module %r has no attribute %r' % (__name__, name))
 
 
 class IdentifiedObject(Object):
@@ -46,13 +79,29 @@ class IdentifiedObject(Object):
         Object.__init__(self)
 
         if rand_id:
-            self.__id = Identity()
+            self.__id = _identity_type()()
         else:
             self.__id = None
 
     def __str__(self):
         return self.id
 
+    def _recycle(self):
+        """
+        Give a reused object a new ID, if it had one.
+        """
+        if self.__id is not None:
+            self.__id = _identity_type()()
+
+    def _restore_id(self, hex_ : str):
+        """
+        Replace the ID of an object rebuilt from a serialized copy.
+        """
+        if hex_ is None:
+            self.__id = None
+        else:
+            self.__id = _identity_type()(hex_)
+
     @property
     def id(self) -> str:
         """
@@ -64,9 +113,9 @@ class IdentifiedObject(Object):
             return None
 
     @id.setter
-    def id(self, id_ : Identity):
+    def id(self, id_ : 'Identity'):
         if self.__id is None:
-            if isinstance(id_, Identity):
+            if isinstance(id_, _identity_type()):
                 self.__id = id_
             else:
                 raise AttributeError('id must be an Identity')
@@ -99,6 +148,7 @@ class NamedObject(Object, metaclass = MetaNamedObject):
         """
         Validate the provided name.
         """
+        import re
         return bool(re.fullmatch('^[\w\d_]+|', name))
 
     @property
@@ -123,6 +173,10 @@ class SingletonObject(Object, metaclass = MetaSingleton):
     pass
 
 
+class MultitonObject(Object, metaclass = MetaMultiton):
+    pass
+
+
 class ConditionalObject(Object, metaclass = MetaConditional):
     """
     An object that requires a condition to be True to call its functions.
@@ -151,9 +205,10 @@ class ConditionalObject(Object, metaclass = MetaConditional):
 
 __all__ = [
     Object,
-    Identity,
+    # Identity is created on first use, see _identity_type.
     IdentifiedObject,
     NamedObject,
     SingletonObject,
+    MultitonObject,
     ConditionalObject,
 ]
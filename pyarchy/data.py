@@ -3,9 +3,17 @@ A container for custom data containers.
 """
 
 
+import bisect
+import itertools
+import sys
+import time
 import types
+import weakref
 
-from .utils import make_deep_copy, raise_key_index_error, StrictArg
+from .common import TimedObject
+from .profiling import hot_path
+from .utils import make_deep_copy, raise_key_index_error, raise_type_error
+from .utils import StrictArg
 
 
 class HardKeySet(object):
@@ -48,6 +56,18 @@ class HardKeySet(object):
         for id_, (k, v) in self.__items.items():
             yield (k, v)
 
+    @classmethod
+    def _from_pairs(cls, pairs):
+        """
+        Return a set of the provided (key, value) pairs, as stored by another
+        set, keyed by the stored keys themselves.
+        """
+        keyset = cls()
+        for k, v in pairs:
+            keyset.__items[id(k)] = (k, v)
+
+        return keyset
+
     def __str__(self):
         return repr(self)
 
@@ -75,11 +95,13 @@ class ItemPool(object):
     """
 
     object_type = object
+    storage_type = set
 
     def __init__(self, *objs):
         self.__readonly = False
         self.__protected = False
-        self.__objects = set(o for o in objs if isinstance(o, self.object_type))
+        self.__objects = self.storage_type(
+            o for o in objs if isinstance(o, self.object_type))
 
     def __str__(self):
         return repr(self)
@@ -87,6 +109,7 @@ class ItemPool(object):
     def __repr__(self):
         return self.__class__.__name__ + '[%i]' % len(self)
 
+    @hot_path
     def __iter__(self):
         """
         A list of the objects in the pool. Can be overridden by subclasses.
@@ -105,6 +128,37 @@ class ItemPool(object):
     def __len__(self):
         return len(self.__objects)
 
+    def __contains__(self, obj):
+        return obj in self.__objects
+
+    @classmethod
+    def from_iterable(cls, iterable, *args, chunk_size: int = 1024,
+                      **kwargs):
+        """
+        Return a new pool, constructed with any other arguments, of the
+        objects in the iterable. The iterable is consumed and its objects
+        type-checked chunk_size at a time.
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+
+        pool = cls(*args, **kwargs)
+        iterator = iter(iterable)
+
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if chunk:
+                pool.extend(chunk)
+            else:
+                return pool
+
+    def _dump_args(self) -> tuple:
+        """
+        The arguments to construct an empty copy of the pool with, when it is
+        loaded from a dump.
+        """
+        return ()
+
     def create(self, *args, **kwargs) -> object:
         """
         Base function for creating new objects in the pool.
@@ -136,6 +190,7 @@ class ItemPool(object):
             else:
                 return func(self, *args, **kwargs)
 
+        wrapper._profile_kind = 'protect_objects'
         return wrapper
 
     @property
@@ -160,6 +215,7 @@ class ItemPool(object):
             else:
                 return func(self, *args, **kwargs)
 
+        wrapper._profile_kind = 'protect_pool'
         return wrapper
 
     @protect_objects
@@ -174,6 +230,7 @@ class ItemPool(object):
             for o in self:
                 func(o)
 
+    @hot_path
     def get(self, **kwargs):
         """
         Return the first item for which the supplied keywords match the item's
@@ -206,6 +263,17 @@ class ItemPool(object):
         else:
             self.__objects.add(obj)
 
+    @protect_objects
+    def extend(self, objs: list):
+        """
+        Add the provided objects to the pool. None are added if any is not
+        of the pool's object type.
+        """
+        if any(not isinstance(o, self.object_type) for o in objs):
+            raise_type_error('objs', '[%s]' % self.object_type)
+        else:
+            self.__objects.update(objs)
+
     @protect_pool
     def update(self, *pools):
         """
@@ -214,7 +282,8 @@ class ItemPool(object):
         if any(not isinstance(p, self.__class__) for p in pools):
             raise TypeError('pools must be of same type')
         else:
-            self.__objects.update(*pools)
+            for pool in pools:
+                self.__objects.update(pool)
 
     def remove(self, obj: object):
         """
@@ -239,7 +308,7 @@ class ItemPool(object):
         object, o, where func(o) is True will be removed from the pool.
         """
         if callable(func):
-            for obj in self.filter(func):
+            for obj in [o for o in self.__objects if func(o)]:
                 self.remove(obj)
         else:
             self.__objects.clear()
@@ -256,8 +325,1178 @@ class ItemPool(object):
         else:
             raise IndexError("can't pop from empty pool")
 
+    def iter_chunks(self, n: int):
+        """
+        Yield lists of up to n objects from the pool, in order of iteration.
+        Only one chunk is copied at a time, so the pool must not be modified
+        until the iteration is finished.
+        """
+        if n < 1:
+            raise ValueError('n must be positive')
+
+        if type(self).__iter__ is ItemPool.__iter__:
+            iterator = iter(self.__objects)
+        else:
+            iterator = iter(self)
+
+        while True:
+            chunk = list(itertools.islice(iterator, n))
+            if chunk:
+                yield chunk
+            else:
+                return
+
+    @protect_pool
+    def drain(self, n: int):
+        """
+        Remove and yield lists of up to n objects until the pool is empty.
+        """
+        if n < 1:
+            raise ValueError('n must be positive')
+
+        return self.__drain(n)
+
+    def __drain(self, n: int):
+        objects = self.__objects
+        while True:
+            chunk = []
+            try:
+                while len(chunk) < n:
+                    chunk.append(objects.pop())
+            except KeyError:
+                pass
+
+            if chunk:
+                yield chunk
+
+            if len(chunk) < n:
+                return
+
+
+class WeakItemPool(ItemPool):
+    """
+    An ItemPool holding weak references to its objects, so that it does not
+    keep them alive. Objects are dropped from the pool as they are collected.
+
+    Objects must support weak references; slotted classes need a
+    __weakref__ slot.
+    """
+
+    storage_type = weakref.WeakSet
+
+
+class TimedItemPool(ItemPool):
+    """
+    An ItemPool of TimedObjects, indexed by their timestamps. Objects are
+    iterated in order of creation (oldest first, unless newest_first is set).
+
+    A retention policy removes the oldest objects from the pool when they
+    exceed a maximum age or count, either on each call to expire or
+    periodically in a background thread.
+
+    The timestamps of objects must not change while they are in the pool.
+    """
+
+    object_type = TimedObject
+    newest_first = False
+
+    def __init__(self, *objs):
+        import threading
+
+        ItemPool.__init__(self, *objs)
+        self.__objs = sorted(ItemPool.__iter__(self), key = self.__time_key)
+        self.__keys = [o.time_key for o in self.__objs]
+        self.__lock = threading.RLock()
+        self.__max_age = None
+        self.__max_count = None
+        self.__on_evict = None
+        self.__expiry_stop = None
+
+    def __getstate__(self):
+        # Locks can't be pickled or copied, and a copy has no expiry thread.
+        state = dict(self.__dict__)
+        del state['_TimedItemPool__lock']
+        state['_TimedItemPool__expiry_stop'] = None
+        return state
+
+    def __setstate__(self, state):
+        import threading
+
+        self.__dict__.update(state)
+        self.__lock = threading.RLock()
+
+    @staticmethod
+    def __time_key(obj):
+        return obj.time_key
+
+    @hot_path
+    def __iter__(self):
+        if self.newest_first:
+            return iter(self.__objs[::-1])
+        else:
+            return iter(list(self.__objs))
+
+    def __reversed__(self):
+        if self.newest_first:
+            return iter(list(self.__objs))
+        else:
+            return iter(self.__objs[::-1])
+
+    def __getitem__(self, idx):
+        with self.__lock:
+            if not self.newest_first:
+                return self.__objs[idx]
+            elif isinstance(idx, int):
+                return self.__objs[-1 - idx]
+            else:
+                return self.__objs[::-1][idx]
+
+    def __insert(self, obj):
+        key = obj.time_key
+        i = bisect.bisect_right(self.__keys, key)
+        self.__keys.insert(i, key)
+        self.__objs.insert(i, obj)
+
+    def __discard(self, obj):
+        i = bisect.bisect_left(self.__keys, obj.time_key)
+        if i == len(self.__objs) or self.__objs[i] is not obj:
+            # The object's timestamp changed while it was in the pool, e.g.
+            # it was recycled, so its stored key is no longer its time_key.
+            i = next(
+                (j for j, o in enumerate(self.__objs) if o is obj),
+                len(self.__objs))
+
+        if i < len(self.__objs):
+            del self.__keys[i]
+            del self.__objs[i]
+
+    def __iter_slice(self, lo, hi):
+        if self.newest_first:
+            return reversed(self.__objs[lo:hi])
+        else:
+            return iter(self.__objs[lo:hi])
+
+    def range(self, start, stop):
+        """
+        Return an iterator of the objects stamped at or after start and
+        before stop.
+        """
+        with self.__lock:
+            lo = bisect.bisect_left(self.__keys, (start,))
+            hi = bisect.bisect_left(self.__keys, (stop,))
+            return self.__iter_slice(lo, max(lo, hi))
+
+    def before(self, time_):
+        """
+        Return an iterator of the objects stamped before the provided time.
+        """
+        with self.__lock:
+            return self.__iter_slice(
+                0, bisect.bisect_left(self.__keys, (time_,)))
+
+    def after(self, time_):
+        """
+        Return an iterator of the objects stamped at or after the provided
+        time.
+        """
+        with self.__lock:
+            lo = bisect.bisect_left(self.__keys, (time_,))
+            return self.__iter_slice(lo, len(self.__objs))
+
+    def add(self, obj: TimedObject):
+        """
+        Add the provided object to the pool.
+        """
+        with self.__lock:
+            new = obj not in self
+            ItemPool.add(self, obj)
+            if new:
+                self.__insert(obj)
+
+    def extend(self, objs: list):
+        """
+        Add the provided objects to the pool. None are added if any is not
+        of the pool's object type.
+        """
+        with self.__lock:
+            new = [o for o in dict.fromkeys(objs) if o not in self]
+            ItemPool.extend(self, new)
+            if not new:
+                return
+
+            new.sort(key = self.__time_key)
+            keys = [o.time_key for o in new]
+
+            if not self.__keys or keys[0] > self.__keys[-1]:
+                self.__keys.extend(keys)
+                self.__objs.extend(new)
+            else:
+                # Both runs are sorted, so this is a linear merge; keys are
+                # unique, so objects are never compared.
+                pairs = sorted(zip(self.__keys + keys, self.__objs + new))
+                self.__keys = [k for k, o in pairs]
+                self.__objs = [o for k, o in pairs]
+
+    def update(self, *pools):
+        """
+        Add to the pool all objects in the provided pool.
+        """
+        with self.__lock:
+            new = set(o for p in pools for o in p if o not in self)
+            ItemPool.update(self, *pools)
+            for obj in sorted(new, key = self.__time_key):
+                self.__insert(obj)
+
+    def remove(self, obj: TimedObject):
+        """
+        Remove the provided object from the pool.
+        """
+        with self.__lock:
+            ItemPool.remove(self, obj)
+            self.__discard(obj)
+
+    def disjoint(self, pool):
+        """
+        Remove from the pool any objects that are also in the provided pool.
+        """
+        with self.__lock:
+            old = [o for o in pool if o in self]
+            ItemPool.disjoint(self, pool)
+            for obj in old:
+                self.__discard(obj)
+
+    @ItemPool.protect_pool
+    def pop(self):
+        """
+        Remove and return the last object from the pool, in order of
+        iteration.
+        """
+        with self.__lock:
+            if not self.__objs:
+                raise IndexError("can't pop from empty pool")
+
+            obj = self[-1]
+            ItemPool.remove(self, obj)
+            self.__discard(obj)
+            return obj
+
+    def clear(self, func: types.FunctionType = None):
+        """
+        Remove all objects from the pool. If a function is provided, only an
+        object, o, where func(o) is True will be removed from the pool.
+        """
+        with self.__lock:
+            ItemPool.clear(self, func)
+            if not callable(func):
+                del self.__keys[:]
+                del self.__objs[:]
+
+    def iter_chunks(self, n: int):
+        """
+        Yield lists of up to n objects from the pool, in order of iteration.
+        Only one chunk is copied at a time, so the pool must not be modified
+        until the iteration is finished.
+        """
+        if n < 1:
+            raise ValueError('n must be positive')
+
+        for i in itertools.count(0, n):
+            with self.__lock:
+                if self.newest_first:
+                    hi = len(self.__objs) - i
+                    chunk = self.__objs[max(hi - n, 0):max(hi, 0)][::-1]
+                else:
+                    chunk = self.__objs[i:i + n]
+
+            if chunk:
+                yield chunk
+            else:
+                return
+
+    @ItemPool.protect_pool
+    def drain(self, n: int):
+        """
+        Remove and yield lists of up to n objects, in order of iteration,
+        until the pool is empty.
+        """
+        if n < 1:
+            raise ValueError('n must be positive')
+
+        return self.__drain(n)
+
+    def __drain(self, n: int):
+        while True:
+            with self.__lock:
+                if self.newest_first:
+                    chunk = self.__objs[:-n - 1:-1]
+                    del self.__objs[-n:]
+                    del self.__keys[-n:]
+                else:
+                    chunk = self.__objs[:n]
+                    del self.__objs[:n]
+                    del self.__keys[:n]
+
+                for obj in chunk:
+                    ItemPool.remove(self, obj)
+
+            if chunk:
+                yield chunk
+            else:
+                return
+
+    @property
+    def max_age(self):
+        """
+        The age, in units of the objects' clock, beyond which objects are
+        expired. None if objects are kept regardless of age.
+        """
+        return self.__max_age
+
+    @property
+    def max_count(self):
+        """
+        The number of objects beyond which the oldest are expired. None if
+        objects are kept regardless of count.
+        """
+        return self.__max_count
+
+    def set_retention(self, max_age = None, max_count = None,
+                      on_evict: types.FunctionType = None):
+        """
+        Set the retention policy of the pool. If provided, on_evict is called
+        with each object removed by expire.
+        """
+        if max_age is not None and max_age < 0:
+            raise ValueError('max_age must not be negative')
+        elif max_count is not None and max_count < 0:
+            raise ValueError('max_count must not be negative')
+        elif on_evict is not None and not callable(on_evict):
+            raise_type_error('on_evict', 'callable')
+
+        self.__max_age = max_age
+        self.__max_count = max_count
+        self.__on_evict = on_evict
+
+    @ItemPool.protect_pool
+    def expire(self, now = None) -> list:
+        """
+        Remove and return the objects that are beyond the retention policy,
+        oldest first. The age of objects is measured against now, which is
+        taken from the clock of the oldest object if not provided.
+        """
+        with self.__lock:
+            n = 0
+
+            if self.__max_age is not None and self.__objs:
+                if now is None:
+                    now = type(self.__objs[0])._clock()
+
+                n = bisect.bisect_left(self.__keys, (now - self.__max_age,))
+
+            if self.__max_count is not None:
+                n = max(n, len(self.__objs) - self.__max_count)
+
+            if n == 0:
+                return []
+
+            expired = self.__objs[:n]
+            del self.__objs[:n]
+            del self.__keys[:n]
+
+            for obj in expired:
+                ItemPool.remove(self, obj)
+
+        if self.__on_evict is not None:
+            for obj in expired:
+                self.__on_evict(obj)
+
+        return expired
+
+    def start_expiry(self, interval: float):
+        """
+        Call expire every interval seconds in a background thread, until
+        stop_expiry is called or the pool is collected.
+        """
+        import threading
+
+        if interval <= 0:
+            raise ValueError('interval must be positive')
+
+        self.stop_expiry()
+        self.__expiry_stop = stop = threading.Event()
+        pool_ref = weakref.ref(self)
+
+        def run():
+            while not stop.wait(interval):
+                pool = pool_ref()
+                if pool is None:
+                    break
+                elif not pool.readonly:
+                    pool.expire()
+
+                del pool
+
+        threading.Thread(
+            target = run,
+            name = repr(self) + ' expiry',
+            daemon = True).start()
+
+    def stop_expiry(self):
+        """
+        Stop the background expiry thread, if running.
+        """
+        if self.__expiry_stop is not None:
+            self.__expiry_stop.set()
+            self.__expiry_stop = None
+
+
+def _attach_shared_memory(name: str):
+    """
+    Attach to an existing shared memory segment without leaving it registered
+    with the resource tracker, which would otherwise destroy it when this
+    process exits.
+    """
+    from multiprocessing import resource_tracker, shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name, track = False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13 attaching always registers the segment.
+    shm = shared_memory.SharedMemory(name)
+    tracked = _tracked_name(shm)
+    if tracked is not None:
+        resource_tracker.unregister(tracked, 'shared_memory')
+
+    return shm
+
+
+def _tracked_name(shm) -> str:
+    """
+    Return the name the resource tracker knows a segment by, or None if
+    segments are not tracked, as on Windows. Only needed before Python 3.13,
+    and relies on private attributes of shared_memory, which are unchanged
+    from 3.8 to 3.12; the fallbacks match what they hold.
+    """
+    from multiprocessing import shared_memory
+
+    if not getattr(shared_memory, '_USE_POSIX', sys.platform != 'win32'):
+        return None
+    else:
+        return getattr(shm, '_name', '/' + shm.name)
+
+
+def _filter_shard(name: str, index: int, func) -> list:
+    pool = SharedItemPool(name)
+    try:
+        return [o for o in pool.shard(index) if func(o)]
+    finally:
+        pool.close()
+
+
+class SharedItemPool(object):
+    """
+    A pool whose objects are pickled into shared memory segments, sharded by
+    a hash of their pickles, so that several processes can query one copy.
+
+    The process which creates the pool is its only writer. Other processes
+    attach to it by name and read it. Each shard keeps a version, which the
+    writer makes odd while writing and even when done. Readers use it to
+    detect changes and to retry reads that overlap a write.
+
+    Objects are decoded per process and per shard, and only again after the
+    shard changes. They are copies, so modifying them does not change the
+    pool. Objects are matched by their pickles, so an object is stored once
+    however many times it is added. The writer indexes the records by a
+    digest of their pickles; removed records are marked deleted, and a shard
+    is compacted once more than half of it is deleted.
+
+    A read waits up to read_timeout seconds for a write to the shard to
+    finish, e.g. if the writer died while writing, before raising
+    TimeoutError.
+    """
+
+    object_type = object
+    read_timeout = 1.0
+
+    # Set in the length of a deleted record.
+    __deleted = 1 << 31
+
+    def __init__(self, name: str, shards: int = None,
+                 shard_size: int = 1 << 20):
+        """
+        Attach to the pool with the provided name, or create it if the number
+        of shards is provided.
+        """
+        import struct
+        from multiprocessing import shared_memory
+
+        self.__meta = struct.Struct('<IQ')
+        self.__header = struct.Struct('<QQQ')
+        self.__length = struct.Struct('<I')
+        self.__name = name
+        self.__writer = shards is not None
+
+        if self.__writer:
+            if shards < 1:
+                raise ValueError('shards must be positive')
+
+            self.__meta_shm = shared_memory.SharedMemory(
+                name,
+                create = True,
+                size = self.__meta.size)
+            self.__meta.pack_into(self.__meta_shm.buf, 0, shards, shard_size)
+            self.__shards = [
+                shared_memory.SharedMemory(
+                    '%s_%i' % (name, i),
+                    create = True,
+                    size = self.__header.size + shard_size)
+                for i in range(shards)
+            ]
+        else:
+            self.__meta_shm = _attach_shared_memory(name)
+            shards, shard_size = self.__meta.unpack_from(
+                self.__meta_shm.buf, 0)
+            self.__shards = [
+                _attach_shared_memory('%s_%i' % (name, i))
+                for i in range(shards)
+            ]
+
+        self.__shard_size = shard_size
+        self.__cache = [(None, [])] * shards
+        # digest -> (shard, offset) of each record, and the deleted bytes of
+        # each shard. Only the writer uses them.
+        self.__index = {}
+        self.__dead = [0] * shards
+
+    def __str__(self):
+        return repr(self)
+
+    def __repr__(self):
+        return self.__class__.__name__ + "('%s')[%i]" % (
+            self.__name,
+            len(self))
+
+    def __len__(self):
+        return sum(
+            self.__header.unpack_from(shm.buf, 0)[1]
+            for shm in self.__shards)
+
+    def __iter__(self):
+        objs = []
+        for i in range(len(self.__shards)):
+            objs.extend(self.shard(i))
+
+        return iter(objs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self.__writer:
+            self.unlink()
+
+    @property
+    def name(self) -> str:
+        """
+        The name the pool's shared memory is attached by.
+        """
+        return self.__name
+
+    @property
+    def writer(self) -> bool:
+        """
+        A boolean representing whether this process can modify the pool.
+        """
+        return self.__writer
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.__shards)
+
+    @property
+    def version(self) -> int:
+        """
+        A number which changes whenever the pool is modified.
+        """
+        return sum(
+            self.__header.unpack_from(shm.buf, 0)[0]
+            for shm in self.__shards)
+
+    def __snapshot(self, index: int):
+        """
+        Return the version of a shard and a copy of its records.
+        """
+        buf = self.__shards[index].buf
+        start = self.__header.size
+        deadline = None
+        delay = 0
+
+        while True:
+            version, count, used = self.__header.unpack_from(buf, 0)
+            if not version & 1:
+                data = bytes(buf[start:start + used])
+                if self.__header.unpack_from(buf, 0)[0] == version:
+                    return version, data
+
+            if deadline is None:
+                deadline = time.monotonic() + self.read_timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError('shard %i is being written' % index)
+
+            time.sleep(delay)
+            delay = min(2 * delay or 1e-6, 1e-3)
+
+    def __records(self, data: bytes):
+        offset = 0
+        while offset < len(data):
+            n, = self.__length.unpack_from(data, offset)
+            offset += self.__length.size
+            if n & self.__deleted:
+                n &= ~self.__deleted
+            else:
+                yield data[offset:offset + n]
+
+            offset += n
+
+    def shard(self, index: int) -> list:
+        """
+        Return the objects in a shard, decoding them if it has changed.
+        """
+        import pickle
+
+        version = self.__header.unpack_from(self.__shards[index].buf, 0)[0]
+        cached_version, objs = self.__cache[index]
+
+        if version != cached_version:
+            version, data = self.__snapshot(index)
+            objs = [pickle.loads(r) for r in self.__records(data)]
+            self.__cache[index] = (version, objs)
+
+        return objs
+
+    def get(self, **kwargs):
+        """
+        Return the first item for which the supplied keywords match the item's
+        attributes. Raises a KeyError if the pool is empty.
+        """
+        for o in self:
+            for kw, val in kwargs.items():
+                if not hasattr(o, kw) or getattr(o, kw) != val:
+                    break
+            else:
+                return o
+
+        raise KeyError('no matching object found')
+
+    def filter(self, func: types.FunctionType, processes: int = None):
+        """
+        Return an ItemPool of the objects, o, where func(o) is True. If a
+        number of processes is provided, the shards are filtered in parallel
+        by that many worker processes, in which case func must be picklable.
+        """
+        if processes is None:
+            return ItemPool(*filter(func, self))
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as executor:
+            results = executor.map(
+                _filter_shard,
+                [self.__name] * len(self.__shards),
+                range(len(self.__shards)),
+                [func] * len(self.__shards))
+
+            return ItemPool(*(o for objs in results for o in objs))
+
+    def protect_pool(func):
+        """
+        A decorator for functions that require the instance be the writer.
+        """
+        def wrapper(self, *args, **kwargs):
+            if not self.writer:
+                raise UserWarning('cannot modify pool')
+            else:
+                return func(self, *args, **kwargs)
+
+        wrapper._profile_kind = 'protect_pool'
+        return wrapper
+
+    def __write(self, index: int, func):
+        """
+        Call func with the shard's buffer, count and used bytes, and store the
+        count and used bytes it returns, while the shard's version is odd.
+        """
+        buf = self.__shards[index].buf
+        version, count, used = self.__header.unpack_from(buf, 0)
+
+        self.__header.pack_into(buf, 0, version + 1, count, used)
+        try:
+            count, used = func(buf, count, used)
+        finally:
+            self.__header.pack_into(buf, 0, version + 2, count, used)
+
+    @staticmethod
+    def __digest(data: bytes) -> bytes:
+        import hashlib
+
+        return hashlib.blake2b(data, digest_size = 16).digest()
+
+    def __encode(self, obj: object):
+        """
+        Return the pickle of an object, its digest and the index of its
+        shard.
+        """
+        import pickle
+
+        data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        digest = self.__digest(data)
+        index = int.from_bytes(digest[:4], 'little') % len(self.__shards)
+        return data, digest, index
+
+    def __compact(self, index: int, buf, used: int) -> int:
+        """
+        Rewrite a shard without its deleted records, reindexing them, and
+        return its used bytes. Must be called while writing the shard.
+        """
+        start = self.__header.size
+        data = bytes(buf[start:start + used])
+        used = 0
+
+        for record in self.__records(data):
+            packed = self.__length.pack(len(record)) + record
+            buf[start + used:start + used + len(packed)] = packed
+            self.__index[self.__digest(record)] = (index, used)
+            used += len(packed)
+
+        self.__dead[index] = 0
+        return used
+
+    @protect_pool
+    def add(self, obj: object):
+        """
+        Add the provided object to the pool, unless it is already there.
+        """
+        if not isinstance(obj, self.object_type):
+            raise_type_error('obj', self.object_type)
+
+        data, digest, index = self.__encode(obj)
+        if digest in self.__index:
+            return
+        elif len(data) >= self.__deleted:
+            raise MemoryError('object is too large')
+
+        record = self.__length.pack(len(data)) + data
+
+        def append(buf, count, used):
+            if used + len(record) > self.__shard_size and self.__dead[index]:
+                used = self.__compact(index, buf, used)
+
+            if used + len(record) > self.__shard_size:
+                raise MemoryError('shard %i is full' % index)
+
+            start = self.__header.size + used
+            buf[start:start + len(record)] = record
+            self.__index[digest] = (index, used)
+            return count + 1, used + len(record)
+
+        self.__write(index, append)
+
+    @protect_pool
+    def remove(self, obj: object):
+        """
+        Remove the provided object, matched by its pickle, from the pool.
+        """
+        data, digest, index = self.__encode(obj)
+        if digest not in self.__index:
+            raise KeyError('object not in pool')
+
+        def delete(buf, count, used):
+            offset = self.__index.pop(digest)[1]
+            start = self.__header.size + offset
+            n, = self.__length.unpack_from(buf, start)
+            self.__length.pack_into(buf, start, n | self.__deleted)
+
+            self.__dead[index] += self.__length.size + n
+            if self.__dead[index] > used // 2:
+                used = self.__compact(index, buf, used)
+
+            return count - 1, used
+
+        self.__write(index, delete)
+
+    @protect_pool
+    def clear(self):
+        """
+        Remove all objects from the pool.
+        """
+        for i in range(len(self.__shards)):
+            self.__write(i, lambda buf, count, used: (0, 0))
+
+        self.__index = {}
+        self.__dead = [0] * len(self.__shards)
+
+    def close(self):
+        """
+        Detach this process from the pool.
+        """
+        self.__cache = [(None, [])] * len(self.__shards)
+        for shm in self.__shards + [self.__meta_shm]:
+            shm.close()
+
+    @protect_pool
+    def unlink(self):
+        """
+        Destroy the pool's shared memory. Attached processes keep their
+        mappings until they close.
+        """
+        from multiprocessing import resource_tracker
+
+        # Before Python 3.13 a reader sharing this process's resource tracker
+        # may have unregistered a segment, which unlink unregisters again.
+        reregister = sys.version_info < (3, 13)
+
+        for shm in self.__shards + [self.__meta_shm]:
+            tracked = _tracked_name(shm) if reregister else None
+            if tracked is not None:
+                resource_tracker.register(tracked, 'shared_memory')
+
+            shm.unlink()
+
+
+_DUMP_MAGIC = b'PYARCHY\x00'
+_DUMP_VERSION = 1
+_DUMP_POOL = 1
+_DUMP_KEYSET = 2
+_DUMP_HEADER = '<8sHBQQQ'
+
+
+def dump(container, path: str):
+    """
+    Write an ItemPool or HardKeySet to a file in a versioned binary format.
+
+    The file holds a header, the container's type and construction arguments,
+    one pickle per object or (key, value) pair, and an index of their offsets.
+    Objects are unpickled without running their constructors, so their IDs,
+    timestamps and names are kept. TimedObjects are resequenced in the order
+    they were dumped when loaded.
+
+    WeakItemPools can't be dumped, as nothing would hold their objects once
+    loaded.
+    """
+    import array
+    import pickle
+    import struct
+
+    if isinstance(container, WeakItemPool):
+        raise TypeError("can't dump a WeakItemPool")
+    elif isinstance(container, ItemPool):
+        kind = _DUMP_POOL
+        items = list(container)
+        args = container._dump_args()
+    elif isinstance(container, HardKeySet):
+        kind = _DUMP_KEYSET
+        items = list(container)
+        args = ()
+    else:
+        raise_type_error('container', (ItemPool, HardKeySet))
+
+    header = struct.Struct(_DUMP_HEADER)
+    meta = pickle.dumps((type(container), args), pickle.HIGHEST_PROTOCOL)
+    offsets = array.array('Q')
+
+    with open(path, 'wb') as f:
+        f.write(bytes(header.size))
+        f.write(meta)
+
+        for item in items:
+            offsets.append(f.tell())
+            f.write(pickle.dumps(item, pickle.HIGHEST_PROTOCOL))
+
+        offsets.append(f.tell())
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+
+        index = f.tell()
+        offsets.tofile(f)
+
+        f.seek(0)
+        f.write(header.pack(
+            _DUMP_MAGIC,
+            _DUMP_VERSION,
+            kind,
+            len(items),
+            header.size,
+            index))
+
+
+def load(path: str, lazy: bool = False):
+    """
+    Read a container written by dump. If lazy, return a MappedContainer which
+    decodes objects only as they are accessed.
+    """
+    mapped = MappedContainer(path)
+    if lazy:
+        return mapped
+
+    try:
+        return mapped.load()
+    finally:
+        mapped.close()
+
+
+class MappedContainer(object):
+    """
+    A read-only view of a container written by dump. The file is memory
+    mapped, and each object is decoded on first access.
+    """
+
+    def __init__(self, path: str):
+        import array
+        import mmap
+        import pickle
+        import struct
+
+        with open(path, 'rb') as f:
+            self.__mmap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
+        try:
+            magic, version, kind, count, meta, index = \
+                struct.unpack_from(_DUMP_HEADER, self.__mmap, 0)
+            if magic != _DUMP_MAGIC:
+                raise ValueError('not a pyarchy dump: %s' % path)
+            elif version > _DUMP_VERSION:
+                raise ValueError('unsupported dump version: %i' % version)
+
+            self.__view = memoryview(self.__mmap)
+            self.__kind = kind
+            self.__sequence = TimedObject._reserve_sequence(count)
+            self.__type, self.__args = pickle.loads(self.__view[meta:index])
+
+            offsets = self.__view[index:index + 8 * (count + 1)]
+            if sys.byteorder == 'big':
+                self.__offsets = array.array('Q', offsets)
+                self.__offsets.byteswap()
+            else:
+                self.__offsets = offsets.cast('Q')
+        except Exception:
+            self.close()
+            raise
+
+        self.__cache = {}
+
+    def __repr__(self):
+        return '%s(%s[%i])' % (
+            self.__class__.__name__,
+            self.__type.__name__,
+            len(self))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.__offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        elif not -len(self) <= idx < len(self):
+            raise IndexError('index out of range')
+
+        idx %= len(self)
+        if idx not in self.__cache:
+            self.__cache[idx] = self.__decode(idx)
+
+        return self.__cache[idx]
+
+    def __decode(self, idx: int):
+        import pickle
+
+        obj = pickle.loads(
+            self.__view[self.__offsets[idx]:self.__offsets[idx + 1]])
+
+        # Sequence numbers are per process, so objects are resequenced from
+        # a block reserved for the container, in the order they were dumped
+        # whichever is decoded first.
+        if isinstance(obj, TimedObject):
+            obj._restore_timestamp(obj.timestamp, self.__sequence + idx)
+
+        return obj
+
+    def __decode_all(self):
+        """
+        Yield every object, decoding those not already decoded without
+        caching them.
+        """
+        cache = self.__cache
+        for i in range(len(self)):
+            if i in cache:
+                yield cache[i]
+            else:
+                yield self.__decode(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def container_type(self) -> type:
+        """
+        The type of the dumped container.
+        """
+        return self.__type
+
+    def get(self, **kwargs):
+        """
+        Return the first item for which the supplied keywords match the item's
+        attributes, decoding items until one is found.
+        """
+        for o in self:
+            for kw, val in kwargs.items():
+                if not hasattr(o, kw) or getattr(o, kw) != val:
+                    break
+            else:
+                return o
+
+        raise KeyError('no matching object found')
+
+    def load(self):
+        """
+        Decode every object and return the container.
+        """
+        if self.__kind == _DUMP_KEYSET:
+            return self.__type._from_pairs(self.__decode_all())
+        else:
+            return self.__type.from_iterable(self.__decode_all(), *self.__args)
+
+    def close(self):
+        """
+        Unmap the file. Decoded objects remain usable.
+        """
+        self.__cache = {}
+        for name in ('_MappedContainer__offsets', '_MappedContainer__view'):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+
+        self.__mmap.close()
+
+
+class FreeList(object):
+    """
+    A bounded list of released objects that are reused in place of creating
+    new ones. Every object made by the list is constructed with the same
+    arguments, and is reset through its _recycle method when reacquired.
+
+    In debug mode, released objects raise a ReferenceError on any attribute
+    access until they are reacquired.
+    """
+
+    __released_types = {}
+
+    def __init__(self, object_type: type, *args,
+                 maxsize: int = 1024, debug: bool = False, **kwargs):
+        if not callable(getattr(object_type, '_recycle', None)):
+            raise TypeError('object_type must define _recycle')
+        elif maxsize < 0:
+            raise ValueError('maxsize must not be negative')
+
+        self.__type = object_type
+        self.__args = args
+        self.__kwargs = kwargs
+        self.__maxsize = maxsize
+        self.__debug = bool(debug)
+        self.__free = []
+
+    def __repr__(self):
+        return self.__class__.__name__ + '[%i]' % len(self)
+
+    def __len__(self):
+        return len(self.__free)
+
+    @property
+    def object_type(self) -> type:
+        """
+        The type of object in the list.
+        """
+        return self.__type
+
+    @property
+    def maxsize(self) -> int:
+        """
+        The maximum number of released objects kept for reuse.
+        """
+        return self.__maxsize
+
+    @classmethod
+    def released_type(cls, object_type: type) -> type:
+        """
+        Return the type a released object takes on in debug mode.
+        """
+        if object_type not in cls.__released_types:
+            def guard(self, name, *args):
+                raise ReferenceError(
+                    'use of released %s' % object_type.__name__)
+
+            cls.__released_types[object_type] = type(object_type)(
+                'Released' + object_type.__name__,
+                (object_type,),
+                {
+                    '__getattribute__': guard,
+                    '__setattr__': guard,
+                    '__delattr__': guard,
+                })
+
+        return cls.__released_types[object_type]
+
+    def acquire(self) -> object:
+        """
+        Return a released object, reset in place, or a new object if there
+        are none.
+        """
+        if not self.__free:
+            return self.__type(*self.__args, **self.__kwargs)
+
+        obj = self.__free.pop()
+        if self.__debug:
+            object.__setattr__(obj, '__class__', type(obj).__bases__[0])
+
+        obj._recycle()
+        return obj
+
+    def release(self, obj: object):
+        """
+        Return an object to the list. The object must not be used again until
+        it is reacquired.
+        """
+        if not isinstance(obj, self.__type):
+            raise_type_error('obj', self.__type)
+        elif self.__debug:
+            if type(obj) in self.__released_types.values():
+                raise ReferenceError('object has already been released')
+            else:
+                object.__setattr__(
+                    obj,
+                    '__class__',
+                    self.released_type(type(obj)))
+
+        if len(self.__free) < self.__maxsize:
+            self.__free.append(obj)
+
 
 __all__ = [
     HardKeySet,
     ItemPool,
+    WeakItemPool,
+    TimedItemPool,
+    SharedItemPool,
+    FreeList,
+    MappedContainer,
+    dump,
+    load,
 ]
@@ -3,9 +3,13 @@ Container for Event Objects.
 """
 
 
+import os
+import struct
+
 from .common import ClassicObject, StrictlyNamedObject
 from .core import ConditionalObject
-from .data import ItemPool
+from .data import TimedItemPool
+from .meta import MetaConditional
 from .utils import raise_type_error, StrictArg
 
 
@@ -14,6 +18,8 @@ class Event(ClassicObject, ConditionalObject):
     _handlers = {}
     _name = ''
 
+    _condition_depends = ('permitted', '_condition')
+
     @classmethod
     def handler(cls, func_or_cls):
         if hasattr(func_or_cls, 'name'):
@@ -33,12 +39,32 @@ class Event(ClassicObject, ConditionalObject):
         ConditionalObject.__init__(self, lambda: self.permitted)
         self.permitted = True
 
+    def __getstate__(self):
+        # The condition closes over the event, so it is rebuilt on unpickling
+        # rather than pickled.
+        state = dict(self.__dict__)
+        state.pop('_ConditionalObject__condition', None)
+        state.pop('_MetaConditional__status', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        ConditionalObject.__init__(self, lambda: self.permitted)
+
     def __str__(self):
         return self.name
 
     def __repr__(self):
         return "Event('%s')" % self.name
 
+    @MetaConditional.ungated
+    def _recycle(self):
+        """
+        Reset the ID, timestamp and permission of a reused event.
+        """
+        ClassicObject._recycle(self)
+        self.permitted = True
+
     def execute(self):
         """
         Execute the code for the event. Override in a subclass.
@@ -58,25 +84,23 @@ class Event(ClassicObject, ConditionalObject):
         self.__permitted = mode
 
 
-class EventPool(ItemPool, StrictlyNamedObject):
+class EventPool(TimedItemPool, StrictlyNamedObject):
+    """
+    A pool of events, iterated in order of creation (newest first).
+    """
 
     object_type = Event
+    newest_first = True
 
     def __init__(self, name, *events: Event):
         if any(not isinstance(e, Event) for e in events):
             raise_type_error('events', Event)
 
-        ItemPool.__init__(self, *events)
+        TimedItemPool.__init__(self, *events)
         StrictlyNamedObject.__init__(self, name)
 
-    def __iter__(self):
-        """
-        Yield the events in the pool in order of creation (newest first).
-        """
-        objs = ItemPool.__iter__(self)
-
-        for e in sorted(objs, reverse=True):
-            yield e
+    def _dump_args(self) -> tuple:
+        return (self.name,)
 
     def create(self, name, args):
         event = Event._handlers[name](*args)
@@ -84,7 +108,220 @@ class EventPool(ItemPool, StrictlyNamedObject):
         return event
 
 
+class EventBus(object):
+    """
+    One end of a connection carrying events between processes over a Unix
+    domain socket.
+
+    Events are sent as (handler name, args, id, timestamp) records, batch_size
+    records per write, and rebuilt through Event._handlers on the receiving
+    end with their original IDs and timestamps. The receiver acknowledges
+    each batch, and the sender blocks while window batches are unacknowledged.
+
+    Records are encoded with marshal, so args may only hold builtin values
+    such as numbers, strings, bytes and tuples, lists, sets and dicts of
+    them. Decoding never runs code, but marshal is not hardened against
+    malicious data and any registered handler may be called, so only trusted
+    processes should be able to connect; EventBusListener makes its socket
+    accessible to its owner only.
+    """
+
+    __frame = struct.Struct('<I')
+
+    def __init__(self, sock, batch_size: int = 256, window: int = 16):
+        if batch_size < 1:
+            raise ValueError('batch_size must be positive')
+        elif window < 1:
+            raise ValueError('window must be positive')
+
+        self.__sock = sock
+        self.__batch_size = batch_size
+        self.__window = window
+        self.__batch = []
+        self.__in_flight = 0
+
+    def __repr__(self):
+        return self.__class__.__name__ + '[%i]' % len(self.__batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def connect(cls, path: str, **kwargs):
+        """
+        Return a bus connected to the listener at the provided path.
+        """
+        import socket
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        return cls(sock, **kwargs)
+
+    def __recv_exactly(self, n: int) -> bytes:
+        data = bytearray()
+        while len(data) < n:
+            chunk = self.__sock.recv(n - len(data))
+            if not chunk:
+                return None
+
+            data += chunk
+
+        return bytes(data)
+
+    @staticmethod
+    def __decode(payload: bytes) -> list:
+        import marshal
+
+        try:
+            records = marshal.loads(payload)
+        except (EOFError, ValueError, TypeError):
+            raise ValueError('malformed event bus batch')
+
+        if not isinstance(records, list) or any(
+            not isinstance(r, tuple)
+            or len(r) != 4
+            or not isinstance(r[0], str)
+            or not isinstance(r[1], tuple)
+            or not isinstance(r[2], (str, type(None)))
+            or not isinstance(r[3], (int, float, type(None)))
+            for r in records):
+                raise ValueError('malformed event bus batch')
+
+        return records
+
+    def __await_ack(self):
+        if self.__recv_exactly(self.__frame.size) is None:
+            raise ConnectionError('event bus closed by receiver')
+
+        self.__in_flight -= 1
+
+    def publish(self, event: Event, *args):
+        """
+        Queue an event to be sent, with the arguments its handler should be
+        called with to rebuild it.
+        """
+        if not isinstance(event, Event):
+            raise_type_error('event', Event)
+
+        self.send(event.name, args, event.id, event.timestamp)
+
+    def send(self, name: str, args: tuple = (), id_: str = None,
+             timestamp = None):
+        """
+        Queue a record of an event to be sent.
+        """
+        self.__batch.append((name, args, id_, timestamp))
+        if len(self.__batch) >= self.__batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Send the queued records as one batch.
+        """
+        import marshal
+
+        if not self.__batch:
+            return
+
+        while self.__in_flight >= self.__window:
+            self.__await_ack()
+
+        payload = marshal.dumps(self.__batch)
+        self.__sock.sendall(self.__frame.pack(len(payload)) + payload)
+        self.__batch = []
+        self.__in_flight += 1
+
+    def receive(self, pool: EventPool = None) -> list:
+        """
+        Wait for the next batch and return its events, adding them to the
+        pool if provided. Returns None once the sender has closed.
+        """
+        header = self.__recv_exactly(self.__frame.size)
+        if header is None:
+            return None
+
+        payload = self.__recv_exactly(self.__frame.unpack(header)[0])
+        if payload is None:
+            raise ConnectionError('event bus closed mid-batch')
+
+        events = []
+        for name, args, id_, timestamp in self.__decode(payload):
+            event = Event._handlers[name](*args)
+            event._restore_id(id_)
+            if timestamp is not None:
+                event._restore_timestamp(timestamp)
+
+            events.append(event)
+
+        self.__sock.sendall(self.__frame.pack(len(events)))
+
+        if pool is not None:
+            pool.extend(events)
+
+        return events
+
+    def close(self):
+        """
+        Send any queued records, wait for them to be acknowledged and close
+        the connection.
+        """
+        try:
+            self.flush()
+            while self.__in_flight:
+                self.__await_ack()
+        finally:
+            self.__sock.close()
+
+
+class EventBusListener(object):
+    """
+    A Unix domain socket which accepts EventBus connections. The socket is
+    made accessible to its owner only, as connections are trusted.
+    """
+
+    def __init__(self, path: str, backlog: int = 8):
+        import socket
+
+        self.__path = path
+        self.__sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__sock.bind(path)
+        os.chmod(path, 0o600)
+        self.__sock.listen(backlog)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def accept(self, **kwargs) -> EventBus:
+        """
+        Wait for a connection and return a bus for it.
+        """
+        sock, _ = self.__sock.accept()
+        return EventBus(sock, **kwargs)
+
+    def close(self):
+        """
+        Stop listening and remove the socket file.
+        """
+        self.__sock.close()
+        try:
+            os.unlink(self.__path)
+        except FileNotFoundError:
+            pass
+
+
 __all__ = [
     Event,
     EventPool,
+    EventBus,
+    EventBusListener,
 ]
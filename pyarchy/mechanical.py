@@ -3,14 +3,211 @@ Container for pseudo-mechanical Object types.
 """
 
 
+import array
+import collections
+import time
+
 from .core import Object
+from .meta import MetaStateMachine
 from .utils import raise_type_error
 
 
+class StateHistory(object):
+    """
+    A fixed-capacity ring buffer of state changes. Each change is packed into
+    a record of a monotonic timestamp in nanoseconds and the codes of the old
+    and new states, so recording allocates nothing while the states it sees
+    are already recorded.
+
+    A state's code is released once no record refers to it, so at most two
+    states per record are kept. Unhashable states, e.g. lists, are copied,
+    so that changing them later does not change the history.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError('capacity must be positive')
+
+        self.__capacity = capacity
+        self.__records = array.array('q', bytes(24 * capacity))
+        self.__reset()
+
+    def __reset(self):
+        self.__next = 0
+        self.__count = 0
+        self.__codes = {}
+        self.__typed_codes = {}
+        self.__unhashable_codes = []
+        # The state and the number of references of each code, and the
+        # codes which are free to reuse.
+        self.__states = []
+        self.__refs = []
+        self.__free = []
+
+    def __repr__(self):
+        return self.__class__.__name__ + '[%i/%i]' % (
+            self.__count,
+            self.__capacity)
+
+    def __len__(self):
+        return self.__count
+
+    def __iter__(self):
+        """
+        Yield (timestamp, old, new) for each recorded change, oldest first.
+        """
+        return self.__iter_range(0, self.__count)
+
+    @property
+    def capacity(self) -> int:
+        """
+        The number of changes kept before the oldest are overwritten.
+        """
+        return self.__capacity
+
+    def __allocate(self, state) -> int:
+        if self.__free:
+            code = self.__free.pop()
+            self.__states[code] = state
+        else:
+            code = len(self.__states)
+            self.__states.append(state)
+            self.__refs.append(0)
+
+        return code
+
+    def __release(self, code: int):
+        """
+        Drop a reference to a code, freeing it if it was the last.
+        """
+        self.__refs[code] -= 1
+        if self.__refs[code]:
+            return
+
+        state = self.__states[code]
+        self.__states[code] = None
+        self.__free.append(code)
+
+        if code in self.__unhashable_codes:
+            self.__unhashable_codes.remove(code)
+        else:
+            del self.__typed_codes[(type(state), state)]
+            if self.__codes.get(state) == code:
+                del self.__codes[state]
+
+    def __encode(self, state) -> int:
+        """
+        Return the code of a state, adding a reference to it.
+        """
+        try:
+            code = self.__codes.get(state)
+        except TypeError:
+            code = self.__encode_unhashable(state)
+        else:
+            if code is None or type(self.__states[code]) is not type(state):
+                # Equal states of different types, e.g. True and 1, need
+                # their own codes.
+                key = (type(state), state)
+                code = self.__typed_codes.get(key)
+                if code is None:
+                    code = self.__typed_codes[key] = self.__allocate(state)
+
+                self.__codes.setdefault(state, code)
+
+        self.__refs[code] += 1
+        return code
+
+    def __encode_unhashable(self, state) -> int:
+        # Unhashable states are looked up linearly.
+        states = self.__states
+        for code in self.__unhashable_codes:
+            if type(states[code]) is type(state) and states[code] == state:
+                return code
+
+        import copy
+
+        code = self.__allocate(copy.deepcopy(state))
+        self.__unhashable_codes.append(code)
+        return code
+
+    def __offset(self, k: int) -> int:
+        """
+        Return the offset of the k-th oldest record.
+        """
+        if self.__count < self.__capacity:
+            return 3 * k
+        else:
+            return 3 * ((self.__next // 3 + k) % self.__capacity)
+
+    def __iter_range(self, lo: int, hi: int):
+        records = self.__records
+        states = self.__states
+
+        for k in range(lo, hi):
+            i = self.__offset(k)
+            yield (records[i], states[records[i + 1]], states[records[i + 2]])
+
+    def __bisect(self, timestamp: int) -> int:
+        lo, hi = 0, self.__count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.__records[self.__offset(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def record(self, old, new):
+        """
+        Record a change from the old state to the new state.
+        """
+        records = self.__records
+        i = self.__next
+        old = self.__encode(old)
+        new = self.__encode(new)
+
+        # The codes of an overwritten record are released after encoding,
+        # so that states still being recorded keep theirs.
+        if self.__count == self.__capacity:
+            refs = self.__refs
+            for code in (records[i + 1], records[i + 2]):
+                if refs[code] > 1:
+                    refs[code] -= 1
+                else:
+                    self.__release(code)
+
+        records[i] = time.monotonic_ns()
+        records[i + 1] = old
+        records[i + 2] = new
+
+        i += 3
+        self.__next = 0 if i == len(records) else i
+        if self.__count < self.__capacity:
+            self.__count += 1
+
+    def window(self, start: int = None, stop: int = None):
+        """
+        Return an iterator of (timestamp, old, new) for the changes recorded
+        at or after start and before stop, in monotonic nanoseconds.
+        """
+        lo = 0 if start is None else self.__bisect(start)
+        hi = self.__count if stop is None else self.__bisect(stop)
+        return self.__iter_range(lo, max(lo, hi))
+
+    def clear(self):
+        """
+        Remove all recorded changes.
+        """
+        self.__reset()
+
+
 class StateObject(Object):
 
     state_types = (type(None),)
 
+    _history = None
+
     def __init__(self, default=None):
         Object.__init__(self)
         self.state = default
@@ -32,8 +229,32 @@ class StateObject(Object):
                 'state',
                 ' or '.join(str(t) for t in self.state_types))
         else:
+            history = self._history
+            if history is not None and state != self.__state:
+                history.record(self.__state, state)
+
             self.__state = state
 
+    @property
+    def history(self) -> StateHistory:
+        """
+        The recorded state changes of the object, or None if not recording.
+        """
+        return self._history
+
+    def record_history(self, capacity: int) -> StateHistory:
+        """
+        Start recording the last capacity state changes of the object.
+        """
+        self._history = StateHistory(capacity)
+        return self._history
+
+    def stop_history(self):
+        """
+        Stop recording state changes and discard those recorded.
+        """
+        self._history = None
+
 
 class BinarySwitch(StateObject):
     """
@@ -74,7 +295,10 @@ class TrinarySwitch(StateObject):
 
 class RotarySwitch(StateObject):
     """
-    A switch that can have any number of states.
+    A switch that can have any number of states. Setting a wrapping switch
+    past either end of its range turns it to the other end; a switch that is
+    not wrapping accepts any position. (A SwitchBank stores positions in a
+    compact buffer, so it clamps those of switches that are not wrapping.)
     """
 
     state_types = (int,)
@@ -109,9 +333,481 @@ class RotarySwitch(StateObject):
         StateObject.state.fset(self, state)
 
 
+Transition = collections.namedtuple(
+    'Transition',
+    ['event', 'source', 'dest', 'guard'])
+Transition.__new__.__defaults__ = (None,)
+
+
+class StateMachine(StateObject, metaclass = MetaStateMachine):
+    """
+    A StateObject whose state changes through declared transitions. See
+    MetaStateMachine for how states, transitions and hooks are declared.
+
+    Setting the state directly skips the transitions and their hooks.
+    """
+
+    states = ()
+    transitions = ()
+    initial = None
+
+    def __init__(self, default = None):
+        if not self.states:
+            raise TypeError('%s declares no states' % self.__class__.__name__)
+        elif default is None:
+            default = self.states[self._initial_code]
+
+        StateObject.__init__(self, default)
+
+    @property
+    def state(self):
+        return self.states[self.__code]
+
+    @state.setter
+    def state(self, state):
+        try:
+            code = self._state_codes[state]
+        except (KeyError, TypeError):
+            raise ValueError('unknown state: %r' % (state,))
+
+        history = self._history
+        if history is not None and code != self.__code:
+            history.record(self.states[self.__code], state)
+
+        self.__code = code
+
+    def __step(self, event):
+        # The transition is recorded from the state it was taken from, even
+        # if the exit hook sets the state directly.
+        code = self.__code
+        try:
+            i = self._event_offsets[event] + code
+        except KeyError:
+            raise KeyError('unknown event: %r' % (event,))
+
+        dest = self._transition_table[i]
+        if dest < 0:
+            return False
+
+        guard = self._guards[i]
+        if guard is not None and not guard(self):
+            return False
+
+        exit_hook = self._exit_hooks[code]
+        if exit_hook is not None:
+            exit_hook(self)
+
+        history = self._history
+        if history is not None and dest != code:
+            history.record(self.states[code], self.states[dest])
+
+        self.__code = dest
+
+        entry_hook = self._entry_hooks[dest]
+        if entry_hook is not None:
+            entry_hook(self)
+
+        return True
+
+    def can_fire(self, event) -> bool:
+        """
+        Return True if the event would cause a transition from the current
+        state.
+        """
+        try:
+            i = self._event_offsets[event] + self.__code
+        except KeyError:
+            raise KeyError('unknown event: %r' % (event,))
+
+        guard = self._guards[i]
+        return self._transition_table[i] >= 0 \
+            and (guard is None or bool(guard(self)))
+
+    def fire(self, event) -> bool:
+        """
+        Take the transition for the event from the current state. Returns
+        False, leaving the state unchanged, if there is no such transition or
+        its guard fails.
+        """
+        return self.__step(event)
+
+    @classmethod
+    def fire_batch(cls, machines, event) -> bytearray:
+        """
+        Fire an event, or one event per machine, on machines of this type.
+        Returns a bytearray holding 1 for each machine that transitioned.
+        """
+        if not cls.states:
+            raise TypeError('%s declares no states' % cls.__name__)
+
+        results = bytearray(len(machines))
+        step = cls.__step
+
+        if isinstance(event, (list, tuple)):
+            if len(event) != len(machines):
+                raise ValueError('expected an event for every machine')
+
+            for n, (machine, e) in enumerate(zip(machines, event)):
+                if not isinstance(machine, cls):
+                    raise_type_error('machines', cls)
+                elif step(machine, e):
+                    results[n] = 1
+
+            return results
+
+        try:
+            offset = cls._event_offsets[event]
+        except KeyError:
+            raise KeyError('unknown event: %r' % (event,))
+
+        # A single event is looked up once, and __step is inlined for
+        # machines of exactly this type, whose tables these are. The two must
+        # be kept in step.
+        states = cls.states
+        table = cls._transition_table
+        guards = cls._guards
+        entry_hooks = cls._entry_hooks
+        exit_hooks = cls._exit_hooks
+
+        for n, machine in enumerate(machines):
+            if type(machine) is not cls:
+                if not isinstance(machine, cls):
+                    raise_type_error('machines', cls)
+                elif step(machine, event):
+                    results[n] = 1
+
+                continue
+
+            code = machine.__code
+            dest = table[offset + code]
+            if dest < 0:
+                continue
+
+            guard = guards[offset + code]
+            if guard is not None and not guard(machine):
+                continue
+
+            hook = exit_hooks[code]
+            if hook is not None:
+                hook(machine)
+
+            history = machine._history
+            if history is not None and dest != code:
+                history.record(states[code], states[dest])
+
+            machine.__code = dest
+
+            hook = entry_hooks[dest]
+            if hook is not None:
+                hook(machine)
+
+            results[n] = 1
+
+        return results
+
+
+class SwitchView(object):
+    """
+    A lightweight handle on a single switch in a SwitchBank. Its state is
+    set as the bank sets it, so the position of a rotary switch that is not
+    wrapping is clamped to its range.
+    """
+
+    __slots__ = ('__bank', '__index', '__weakref__')
+
+    def __init__(self, bank, index: int):
+        self.__bank = bank
+        self.__index = index
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.__bank.switch_type.__name__, self.state)
+
+    @property
+    def bank(self):
+        """
+        The SwitchBank holding the switch.
+        """
+        return self.__bank
+
+    @property
+    def index(self) -> int:
+        """
+        The position of the switch in its bank.
+        """
+        return self.__index
+
+    @property
+    def state_types(self) -> tuple:
+        return self.__bank.switch_type.state_types
+
+    @property
+    def wrapping(self) -> bool:
+        return self.__bank.wrapping
+
+    @property
+    def state(self):
+        return self.__bank.get(self.__index)
+
+    @state.setter
+    def state(self, state):
+        self.__bank.set((self.__index,), (state,))
+
+    def toggle(self):
+        """
+        Switch to the opposite state.
+        """
+        self.__bank.toggle(self.__index)
+
+    def switch(self):
+        """
+        Switch the function from positive to negative, or remain off.
+        """
+        self.__bank.switch((self.__index,))
+
+    def advance(self, n: int = 1):
+        """
+        Turn the switch n positions.
+        """
+        self.__bank.advance((self.__index,), n)
+
+
+class SwitchBank(Object):
+    """
+    A fixed number of BinarySwitches, TrinarySwitches or RotarySwitches with
+    their states stored in a single compact buffer. Indexing the bank returns
+    a SwitchView which behaves like a switch of the bank's type.
+
+    Indices may be given as None (every switch), a slice, or an iterable of
+    integers.
+
+    Rotary switches are set as RotarySwitch.state sets them, except that a
+    switch that is not wrapping is clamped to its range rather than storing
+    any position.
+    """
+
+    __trinary_codes = {None: 0, False: 1, True: 2}
+    __trinary_states = (None, False, True)
+    __toggle_table = bytes([1, 0]) + bytes(range(2, 256))
+    __switch_table = bytes([0, 2, 1]) + bytes(range(3, 256))
+
+    def __init__(self, switch_type: type, size: int,
+                 num_positions: int = 0, wrapping: bool = False):
+        assert size >= 0
+        assert num_positions >= 0
+
+        if issubclass(switch_type, BinarySwitch):
+            self.__kind = BinarySwitch
+        elif issubclass(switch_type, TrinarySwitch):
+            self.__kind = TrinarySwitch
+        elif issubclass(switch_type, RotarySwitch):
+            self.__kind = RotarySwitch
+        else:
+            raise_type_error(
+                'switch_type',
+                (BinarySwitch, TrinarySwitch, RotarySwitch))
+
+        self.__type = switch_type
+        self.__wrapping = bool(wrapping)
+        self.__positions = num_positions + 1
+
+        if self.__kind is not RotarySwitch or self.__positions <= 0x100:
+            self.__states = bytearray(size)
+        elif self.__positions <= 0x10000:
+            self.__states = array.array('H', bytes(2 * size))
+        else:
+            self.__states = array.array('L', [0]) * size
+
+    def __repr__(self):
+        return '{0}({1}[{2}])'.format(
+            self.__class__.__name__,
+            self.__type.__name__,
+            len(self))
+
+    def __len__(self):
+        return len(self.__states)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [SwitchView(self, i) for i in self.__indices(idx)]
+        elif -len(self) <= idx < len(self):
+            return SwitchView(self, idx % len(self))
+        else:
+            raise IndexError('switch index out of range')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield SwitchView(self, i)
+
+    @property
+    def switch_type(self) -> type:
+        """
+        The type of switch in the bank.
+        """
+        return self.__type
+
+    @property
+    def wrapping(self) -> bool:
+        """
+        A boolean representing whether rotary switches can be turned
+        infinitely.
+        """
+        return self.__wrapping
+
+    @property
+    def buffer(self) -> memoryview:
+        """
+        A view of the raw, encoded states, e.g. for numpy.frombuffer.
+        """
+        return memoryview(self.__states)
+
+    def __indices(self, indices):
+        if indices is None:
+            return range(len(self))
+        elif isinstance(indices, slice):
+            return range(*indices.indices(len(self)))
+        elif isinstance(indices, (list, tuple, range)):
+            return indices
+        else:
+            # e.g. a generator, which set needs the length of.
+            return list(indices)
+
+    def __require(self, kind, op):
+        if self.__kind is not kind:
+            raise TypeError('{0} is not supported by {1}'.format(
+                op,
+                self.__type.__name__))
+
+    def __encode(self, state):
+        if not isinstance(state, self.__type.state_types):
+            raise_type_error('state', self.__type.state_types)
+        elif self.__kind is TrinarySwitch:
+            return self.__trinary_codes[state]
+        elif self.__kind is RotarySwitch:
+            return self.__position(state)
+        else:
+            return int(state)
+
+    def __position(self, state: int) -> int:
+        if 0 <= state < self.__positions:
+            return state
+        elif self.__wrapping:
+            return 0 if state > 0 else self.__positions - 1
+        else:
+            return min(max(state, 0), self.__positions - 1)
+
+    def __bound(self, position: int) -> int:
+        if self.__wrapping:
+            return position % self.__positions
+        else:
+            return min(max(position, 0), self.__positions - 1)
+
+    def get(self, index: int):
+        """
+        Return the state of the switch at the provided index.
+        """
+        code = self.__states[index]
+        if self.__kind is BinarySwitch:
+            return bool(code)
+        elif self.__kind is TrinarySwitch:
+            return self.__trinary_states[code]
+        else:
+            return code
+
+    def states(self, indices = None) -> list:
+        """
+        Return the states of the switches at the provided indices.
+        """
+        return [self.get(i) for i in self.__indices(indices)]
+
+    def set(self, indices, values):
+        """
+        Set the states of the switches at the provided indices. A single
+        state is applied to every index. Rotary positions past either end of
+        the range of wrapping switches turn them to the other end, and are
+        otherwise clamped to it.
+        """
+        if isinstance(indices, int):
+            indices = (indices,)
+            values = (values,)
+
+        indices = self.__indices(indices)
+        if isinstance(values, self.__type.state_types):
+            code = self.__encode(values)
+            for i in indices:
+                self.__states[i] = code
+        else:
+            codes = [self.__encode(v) for v in values]
+            if len(codes) != len(indices):
+                raise ValueError('expected a state for every index')
+
+            for i, code in zip(indices, codes):
+                self.__states[i] = code
+
+    def toggle(self, mask = None):
+        """
+        Toggle every binary switch, or only those where the mask is True.
+        The mask may also be a single index.
+        """
+        self.__require(BinarySwitch, 'toggle')
+        states = self.__states
+
+        if mask is None:
+            states[:] = states.translate(self.__toggle_table)
+        elif isinstance(mask, int):
+            states[mask] ^= 1
+        else:
+            mask = bytes(mask)
+            if len(mask) != len(states):
+                raise ValueError('mask must be the size of the bank')
+            elif mask.translate(None, b'\x00\x01'):
+                raise ValueError('mask must contain only 0 or 1')
+
+            states[:] = (
+                int.from_bytes(states, 'big') ^ int.from_bytes(mask, 'big')
+            ).to_bytes(len(states), 'big')
+
+    def switch(self, indices = None):
+        """
+        Switch the trinary switches at the provided indices from positive to
+        negative, leaving those that are off.
+        """
+        self.__require(TrinarySwitch, 'switch')
+        states = self.__states
+        table = self.__switch_table
+
+        if indices is None:
+            states[:] = states.translate(table)
+        else:
+            for i in self.__indices(indices):
+                states[i] = table[states[i]]
+
+    def advance(self, indices = None, n: int = 1):
+        """
+        Turn the rotary switches at the provided indices n positions, as if
+        each were turned n times. Switches that are not wrapping stop at
+        either end of their range.
+        """
+        self.__require(RotarySwitch, 'advance')
+        states = self.__states
+
+        if indices is None and isinstance(states, bytearray):
+            table = bytes(
+                self.__bound(v + n) if v < self.__positions else v
+                for v in range(0x100))
+            states[:] = states.translate(table)
+        else:
+            for i in self.__indices(indices):
+                states[i] = self.__bound(states[i] + n)
+
+
 __all__ = [
+    StateHistory,
     StateObject,
     BinarySwitch,
     TrinarySwitch,
     RotarySwitch,
+    Transition,
+    StateMachine,
+    SwitchView,
+    SwitchBank,
 ]
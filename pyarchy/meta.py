@@ -3,6 +3,8 @@ Container for metaclasses.
 """
 
 
+import _thread
+import time
 import types
 
 
@@ -22,18 +24,243 @@ class MetaSingleton(MetaNamedObject):
 
     __instance = None
 
+    def __init__(cls, name, bases, attrs):
+        type.__init__(cls, name, bases, attrs)
+        # Each class has its own lock, so that the constructor of one
+        # singleton can wait on another being made in a different thread.
+        cls.__lock = _thread.RLock()
+
     def __call__(cls, *args, **kwargs):
         if not cls.__instance:
-            cls.__instance = super(MetaSingleton, cls).__call__(*args, **kwargs)
+            with cls.__lock:
+                if not cls.__instance:
+                    cls.__instance = super(MetaSingleton, cls).__call__(
+                        *args, **kwargs)
 
         return cls.__instance
 
 
+_lazy_lock = _thread.allocate_lock()
+
+
+def _cache_info_type() -> type:
+    """
+    Return the CacheInfo class, creating it on first use so that collections
+    is only imported when a cache is used.
+    """
+    global CacheInfo
+
+    try:
+        return CacheInfo
+    except NameError:
+        pass
+
+    with _lazy_lock:
+        if 'CacheInfo' not in globals():
+            import collections
+
+            CacheInfo = collections.namedtuple(
+                'CacheInfo',
+                ['hits', 'misses', 'evictions', 'size'])
+            CacheInfo.__module__ = __name__
+
+    return CacheInfo
+
+
+def __getattr__(name):
+    if name == 'CacheInfo':
+        return _cache_info_type()
+    else:
+        raise AttributeError(
+            'module %r has no attribute %r' % (__name__, name))
+
+
+class MetaMultiton(MetaNamedObject):
+    """
+    A metaclass for any class that should make only one instance per set of
+    constructor arguments.
+
+    Instances are kept in a per-class cache which is configured with the
+    _multiton_maxsize (least recently used instances are evicted beyond it),
+    _multiton_ttl (seconds an instance is kept) and _multiton_weak (instances
+    are kept only while referenced elsewhere) class attributes.
+    """
+
+    __kwargs_mark = object()
+
+    def __init__(cls, name, bases, attrs):
+        type.__init__(cls, name, bases, attrs)
+
+        maxsize = getattr(cls, '_multiton_maxsize', None)
+        ttl = getattr(cls, '_multiton_ttl', None)
+        weak = getattr(cls, '_multiton_weak', False)
+
+        if weak and (maxsize is not None or ttl is not None):
+            raise ValueError('weak multitons cannot have a maxsize or ttl')
+        elif maxsize is not None and maxsize < 1:
+            raise ValueError('maxsize must be positive')
+        elif ttl is not None and ttl <= 0:
+            raise ValueError('ttl must be positive')
+
+        cls.__maxsize = maxsize
+        cls.__ttl = ttl
+        cls.__weak = bool(weak)
+        cls.__stats = [0, 0, 0]
+        cls.__lock = _thread.RLock()
+        cls.__building = {}
+        # The cache and the (expires, key) pairs in order of expiry, as every
+        # entry has the same ttl, are made on first use, so that collections
+        # and weakref are only imported when a multiton is made.
+        cls.__cache = None
+        cls.__expiries = None
+
+    def __make_cache(cls):
+        """
+        Create the cache. Must be called with the class lock held.
+        """
+        import collections
+        import weakref
+
+        if cls.__weak:
+            cls.__cache = weakref.WeakValueDictionary()
+        else:
+            cls.__cache = collections.OrderedDict()
+
+        cls.__expiries = collections.deque()
+
+    def __lookup(cls, key):
+        """
+        Return the cached instance for the key, or None. Must be called with
+        the class lock held.
+        """
+        if cls.__weak:
+            instance = cls.__cache.get(key)
+            if instance is not None:
+                cls.__stats[0] += 1
+
+            return instance
+        elif key in cls.__cache:
+            instance, expires = cls.__cache[key]
+            if expires is None or expires > time.monotonic():
+                cls.__cache.move_to_end(key)
+                cls.__stats[0] += 1
+                return instance
+            else:
+                del cls.__cache[key]
+                cls.__stats[2] += 1
+
+        return None
+
+    def __purge(cls):
+        """
+        Evict expired instances, oldest first. Must be called with the class
+        lock held.
+        """
+        now = time.monotonic()
+        expiries = cls.__expiries
+
+        while expiries and expiries[0][0] <= now:
+            expires, key = expiries.popleft()
+            entry = cls.__cache.get(key)
+            # The key may since have been evicted or built again.
+            if entry is not None and entry[1] == expires:
+                del cls.__cache[key]
+                cls.__stats[2] += 1
+
+    def __call__(cls, *args, **kwargs):
+        key = args
+        if kwargs:
+            key += (MetaMultiton.__kwargs_mark,)
+            key += tuple(sorted(kwargs.items()))
+
+        with cls.__lock:
+            if cls.__cache is None:
+                cls.__make_cache()
+
+            instance = cls.__lookup(key)
+            if instance is not None:
+                return instance
+
+            build_lock = cls.__building.setdefault(
+                key, _thread.allocate_lock())
+
+        # Instances are built outside the class lock, so that a slow build
+        # only holds up calls for the same key.
+        with build_lock:
+            with cls.__lock:
+                instance = cls.__lookup(key)
+                if instance is not None:
+                    return instance
+
+            try:
+                instance = super(MetaMultiton, cls).__call__(*args, **kwargs)
+            except BaseException:
+                with cls.__lock:
+                    if cls.__building.get(key) is build_lock:
+                        del cls.__building[key]
+
+                raise
+
+            # The instance is cached in the same block that drops the build
+            # lock, so no caller can miss both.
+            with cls.__lock:
+                if cls.__building.get(key) is build_lock:
+                    del cls.__building[key]
+
+                cls.__stats[1] += 1
+
+                if cls.__weak:
+                    cls.__cache[key] = instance
+                    return instance
+
+                if cls.__ttl is None:
+                    expires = None
+                else:
+                    cls.__purge()
+                    expires = time.monotonic() + cls.__ttl
+                    cls.__expiries.append((expires, key))
+
+                cls.__cache[key] = (instance, expires)
+
+                if cls.__maxsize is not None \
+                    and len(cls.__cache) > cls.__maxsize:
+                        cls.__cache.popitem(last = False)
+                        cls.__stats[2] += 1
+
+            return instance
+
+    def cache_info(cls) -> 'CacheInfo':
+        """
+        Return the hit, miss and eviction counts, and the size of the cache.
+        """
+        with cls.__lock:
+            return _cache_info_type()(
+                *cls.__stats,
+                len(cls.__cache or ()))
+
+    def cache_clear(cls):
+        """
+        Remove all instances from the cache and reset its statistics.
+        """
+        with cls.__lock:
+            if cls.__cache is not None:
+                cls.__cache.clear()
+                cls.__expiries.clear()
+
+            cls.__stats[:] = [0, 0, 0]
+
+
 class MetaConditional(MetaNamedObject):
     """
     A metaclass for any object that requires that a function returns True to
     call its functions.
 
+    Setting _cache_condition to True on a class stores the result of the
+    condition per instance. The cached result is recomputed only after a call
+    to invalidate_condition, or after any attribute named in
+    _condition_depends is set. A class defining its own _condition does not
+    inherit the cached mode, and must opt in again.
+
     Note: MetaConditional is a subclass of MetaNamedObject only to pacify the
     metaclass conflict we get in the Event class.
     """
@@ -50,21 +277,85 @@ class MetaConditional(MetaNamedObject):
             else:
                 return None
 
+        func_wrapper._profile_kind = 'MetaConditional'
+        return func_wrapper
+
+    @staticmethod
+    def ungated(func: types.FunctionType):
+        """
+        A decorator for functions that should be called regardless of the
+        condition.
+        """
+        func._ungated = True
+        return func
+
+    @classmethod
+    def cached_status_checker(cls, func: types.FunctionType):
+        """
+        A variant of status_checker that evaluates the condition only when the
+        cached result has been invalidated.
+        """
+        def func_wrapper(self, *args, **kwargs):
+            status = self.__status
+            if status is None:
+                status = self.__status = bool(self.__condition())
+
+            if status:
+                return func(self, *args, **kwargs)
+            else:
+                return None
+
+        func_wrapper._profile_kind = 'MetaConditional'
         return func_wrapper
 
+    @staticmethod
+    def invalidate_condition(self):
+        """
+        Discard the cached result of the condition.
+        """
+        object.__setattr__(self, '_MetaConditional__status', None)
+
+    @staticmethod
+    def dependency_setter(cls, depends: tuple):
+        """
+        Return a __setattr__ for cls that invalidates the cached condition when
+        any of the named attributes is set.
+        """
+        depends = frozenset(depends)
+
+        def __setattr__(self, name, value):
+            super(cls, self).__setattr__(name, value)
+            if name in depends:
+                object.__setattr__(self, '_MetaConditional__status', None)
+
+        return __setattr__
+
     def __new__(cls, name, bases, attrs):
         """
         Decorate all public methods with the status_checker function.
         """
 
+        inherited = any(getattr(b, '_cache_condition', False) for b in bases)
+        if '_cache_condition' in attrs:
+            cached = bool(attrs['_cache_condition'])
+        else:
+            cached = inherited and '_condition' not in attrs
+
+        if cached:
+            checker = cls.cached_status_checker
+        else:
+            checker = cls.status_checker
+
         for k, v in attrs.items():
             if k == '_condition':
                 if isinstance(v, (property, types.FunctionType)):
                     condition_func = v
                 else:
                     condition_func = lambda self: bool(v)
-            elif not k.startswith('__') and isinstance(v, types.FunctionType):
-                attrs[k] = cls.status_checker(v)
+            elif not k.startswith('__') \
+                and isinstance(v, types.FunctionType) \
+                and not getattr(v, '_ungated', False):
+                    attrs[k] = checker(v)
             else:
                 continue
 
@@ -84,11 +375,106 @@ class MetaConditional(MetaNamedObject):
         except NameError:
             raise AttributeError('expected %s._condition' % name)
 
-        return type.__new__(cls, name, bases, attrs)
+        if cached:
+            attrs['_MetaConditional__status'] = None
+            attrs['invalidate_condition'] = cls.invalidate_condition
+
+        new_cls = type.__new__(cls, name, bases, attrs)
+
+        # The first cached class in a hierarchy, or one declaring its own
+        # dependencies, needs a __setattr__ watching them.
+        depends = getattr(new_cls, '_condition_depends', ())
+        if cached and depends \
+            and ('_condition_depends' in attrs or not inherited):
+                new_cls.__setattr__ = cls.dependency_setter(new_cls, depends)
+
+        return new_cls
+
+
+class MetaStateMachine(MetaNamedObject):
+    """
+    A metaclass for any object whose states and transitions are declared at
+    the class level.
+
+    The states sequence and the transitions, (event, source, dest, guard)
+    tuples, are compiled into a dense table of state indices, indexed by the
+    offset of the event plus the index of the current state. A source may be
+    a state, a tuple of states, or '*' for every state. A guard may be a
+    function or the name of a method, which must return True for the
+    transition to be taken. Methods named on_enter_<state> and
+    on_exit_<state> are collected as hooks.
+    """
+
+    def __init__(cls, name, bases, attrs):
+        type.__init__(cls, name, bases, attrs)
+
+        states = tuple(getattr(cls, 'states', ()))
+        if not states:
+            return
+        elif len(set(states)) != len(states):
+            raise ValueError('states must be unique')
+
+        codes = dict((s, i) for i, s in enumerate(states))
+        transitions = [
+            (tuple(t) + (None,))[:4]
+            for t in getattr(cls, 'transitions', ())
+        ]
+
+        offsets = {}
+        for event, source, dest, guard in transitions:
+            offsets.setdefault(event, len(offsets) * len(states))
+
+        import array
+
+        table = array.array('i', [-1]) * (len(offsets) * len(states))
+        guards = [None] * len(table)
+
+        for event, source, dest, guard in transitions:
+            if source == '*':
+                sources = states
+            elif isinstance(source, (tuple, list)):
+                sources = source
+            else:
+                sources = (source,)
+
+            if isinstance(guard, str):
+                guard = getattr(cls, guard)
+
+            for s in (dest,) + tuple(sources):
+                if s not in codes:
+                    raise ValueError('unknown state: %r' % (s,))
+
+            for s in sources:
+                i = offsets[event] + codes[s]
+                if table[i] >= 0:
+                    raise ValueError(
+                        'duplicate transition: %r from %r' % (event, s))
+                else:
+                    table[i] = codes[dest]
+                    guards[i] = guard
+
+        initial = getattr(cls, 'initial', None)
+        if initial is None:
+            initial = states[0]
+        elif initial not in codes:
+            raise ValueError('unknown state: %r' % (initial,))
+
+        cls.states = states
+        cls._state_codes = codes
+        cls._event_offsets = offsets
+        cls._transition_table = table
+        cls._guards = guards
+        cls._initial_code = codes[initial]
+        cls._entry_hooks = tuple(
+            getattr(cls, 'on_enter_%s' % s, None) for s in states)
+        cls._exit_hooks = tuple(
+            getattr(cls, 'on_exit_%s' % s, None) for s in states)
 
 
 __all__ = [
     MetaNamedObject,
     MetaSingleton,
+    MetaMultiton,
     MetaConditional,
+    MetaStateMachine,
 ]
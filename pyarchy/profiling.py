@@ -0,0 +1,277 @@
+"""
+Container for opt-in profiling of pyarchy's hot paths.
+
+Hot paths are marked with a _profile_kind attribute, either by hot_path or by
+the wrappers of StrictArg, ItemPool.protect_objects, ItemPool.protect_pool
+and MetaConditional. Marking costs nothing: while profiling is disabled the
+marked functions are called directly. enable replaces every marked function
+of pyarchy's modules and classes, and of their loaded subclasses, with one
+that counts its calls and times them, as are the marked functions they wrap;
+disable restores the originals.
+
+Times are inclusive, so a hot path calling another is timed for both.
+"""
+
+
+import sys
+import time
+import types
+
+
+class Counter(object):
+    """
+    The number of calls to a hot path and the wall time of those timed.
+    """
+
+    __slots__ = ('calls', 'timed', 'total_ns')
+
+    def __init__(self):
+        self.calls = 0
+        self.timed = 0
+        self.total_ns = 0
+
+    def __repr__(self):
+        return 'Counter(%i, %i, %i)' % (self.calls, self.timed, self.total_ns)
+
+    @property
+    def mean_ns(self) -> float:
+        """
+        The mean wall time of a timed call.
+        """
+        return self.total_ns / self.timed if self.timed else 0.0
+
+    @property
+    def estimated_ns(self) -> float:
+        """
+        The wall time of all calls, estimated from those timed.
+        """
+        return self.mean_ns * self.calls
+
+
+_counters = {}
+_patches = []
+
+
+def hot_path(func: types.FunctionType) -> types.FunctionType:
+    """
+    Mark a function to be timed while profiling is enabled.
+    """
+    func._profile_kind = ''
+    return func
+
+
+def is_enabled() -> bool:
+    """
+    Return True if profiling is enabled.
+    """
+    return bool(_patches)
+
+
+def _label(func, location: str) -> str:
+    if func._profile_kind:
+        return '%s:%s' % (func._profile_kind, location)
+    else:
+        return location
+
+
+def _timed(func, counter: Counter, sample: int):
+    perf_counter_ns = time.perf_counter_ns
+
+    if sample == 1:
+        def wrapper(*args, **kwargs):
+            counter.calls += 1
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                counter.timed += 1
+                counter.total_ns += perf_counter_ns() - start
+    else:
+        def wrapper(*args, **kwargs):
+            counter.calls += 1
+            if counter.calls % sample:
+                return func(*args, **kwargs)
+
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                counter.timed += 1
+                counter.total_ns += perf_counter_ns() - start
+
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = func.__qualname__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _instrument(func, location: str, sample: int):
+    if not isinstance(func, types.FunctionType) \
+        or not hasattr(func, '_profile_kind'):
+            return None
+
+    _instrument_closure(func, location, sample)
+
+    label = _label(func, location)
+    if label not in _counters:
+        _counters[label] = Counter()
+
+    return _timed(func, _counters[label], sample)
+
+
+def _instrument_closure(func, location: str, sample: int):
+    """
+    Instrument the hot paths wrapped by a hot path, e.g. a StrictArg wrapper
+    under protect_objects, which are held in its closure rather than by a
+    module or class.
+    """
+    for cell in func.__closure__ or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            continue
+
+        new = _instrument(value, location, sample)
+        if new is not None:
+            _patches.append((cell, 'cell_contents', value))
+            cell.cell_contents = new
+
+
+def _instrument_attr(value, location: str, sample: int):
+    """
+    Return the instrumented version of a class or module attribute, or None
+    if it holds no hot path.
+    """
+    if isinstance(value, (staticmethod, classmethod)):
+        func = _instrument(value.__func__, location, sample)
+        return None if func is None else type(value)(func)
+    elif isinstance(value, property):
+        fget, fset, fdel = (
+            _instrument(f, location, sample)
+            for f in (value.fget, value.fset, value.fdel))
+        if fget is fset is fdel is None:
+            return None
+        else:
+            return property(
+                fget or value.fget,
+                fset or value.fset,
+                fdel or value.fdel,
+                value.__doc__)
+    else:
+        return _instrument(value, location, sample)
+
+
+def _targets():
+    """
+    Yield the modules of pyarchy, their classes and every loaded subclass.
+    """
+    modules = [
+        m for n, m in sorted(sys.modules.items())
+        if n == 'pyarchy' or n.startswith('pyarchy.')
+    ]
+
+    classes = []
+    seen = set()
+    for module in modules:
+        yield module, module.__name__ + '.'
+        classes.extend(
+            v for v in vars(module).values()
+            if isinstance(v, type) and v.__module__ == module.__name__)
+
+    while classes:
+        cls = classes.pop()
+        if cls not in seen:
+            seen.add(cls)
+            classes.extend(type.__subclasses__(cls))
+            yield cls, cls.__qualname__ + '.'
+
+
+def enable(sample: int = 1):
+    """
+    Start profiling. Every call to a hot path is counted, and every sample-th
+    call is timed.
+    """
+    if sample < 1:
+        raise ValueError('sample must be positive')
+
+    disable()
+
+    for owner, prefix in list(_targets()):
+        for name, value in list(vars(owner).items()):
+            if isinstance(owner, types.ModuleType) \
+                and isinstance(value, types.FunctionType):
+                    # Functions are labelled where they are defined, so that
+                    # each name they are imported under shares one counter.
+                    location = value.__qualname__
+            else:
+                location = prefix + name
+
+            new = _instrument_attr(value, location, sample)
+            if new is not None:
+                _patches.append((owner, name, value))
+                setattr(owner, name, new)
+
+
+def disable():
+    """
+    Stop profiling, restoring the original hot paths. Counts are kept.
+    """
+    while _patches:
+        owner, name, value = _patches.pop()
+        setattr(owner, name, value)
+
+
+def reset():
+    """
+    Discard all counts.
+    """
+    _counters.clear()
+
+
+def stats() -> dict:
+    """
+    Return a dict of the counts for each hot path that has been called.
+    """
+    return dict(
+        (label, {
+            'calls': c.calls,
+            'timed': c.timed,
+            'total_ns': c.total_ns,
+            'mean_ns': c.mean_ns,
+            'estimated_ns': c.estimated_ns,
+        })
+        for label, c in _counters.items()
+        if c.calls)
+
+
+def report(file = None):
+    """
+    Print a table of the counts, ordered by estimated time.
+    """
+    file = file or sys.stdout
+    rows = sorted(
+        stats().items(),
+        key = lambda item: item[1]['estimated_ns'],
+        reverse = True)
+
+    print('%-48s %10s %12s %12s' % ('hot path', 'calls', 'mean us',
+                                    'total ms'), file = file)
+    for label, s in rows:
+        print('%-48s %10i %12.3f %12.3f' % (
+            label,
+            s['calls'],
+            s['mean_ns'] / 1e3,
+            s['estimated_ns'] / 1e6), file = file)
+
+
+__all__ = [
+    Counter,
+    hot_path,
+    is_enabled,
+    enable,
+    disable,
+    reset,
+    stats,
+    report,
+]
@@ -6,7 +6,10 @@ Container for useful functions.
 import copy
 import types
 
+from .profiling import hot_path
 
+
+@hot_path
 def make_deep_copy(object_, n = 1) -> list:
     """
     Return n deepcopies of the object
@@ -90,6 +93,8 @@ class StrictArg(object):
                     raise_type_error(self.__name, '{:%s}' % type(arg))
             else:
                 return func(*args, **kwargs)
+
+        inner_wrapper._profile_kind = 'StrictArg'
         return inner_wrapper
 
 
@@ -0,0 +1,134 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from pyarchy.common import ClassicObject
+from pyarchy.data import dump, HardKeySet, ItemPool, load, MappedContainer
+from pyarchy.data import SharedItemPool, WeakItemPool
+from pyarchy.events import Event, EventPool
+
+
+class TestDump(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'dump.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_item_pool(self):
+        objs = [ClassicObject('obj%i' % i) for i in range(5)]
+        dump(ItemPool(*objs), self.path)
+
+        pool = load(self.path)
+        self.assertIs(type(pool), ItemPool)
+        self.assertEqual(
+            sorted((o.id, o.name, o.timestamp) for o in pool),
+            sorted((o.id, o.name, o.timestamp) for o in objs))
+
+    def test_event_pool(self):
+        events = [Event() for _ in range(5)]
+        dump(EventPool('events', *events), self.path)
+
+        for pool in (load(self.path), load(self.path, lazy = True).load()):
+            self.assertIs(type(pool), EventPool)
+            self.assertEqual(pool.name, 'events')
+            self.assertEqual(
+                [e.id for e in pool],
+                [e.id for e in reversed(events)])
+
+    def test_lazy_resequences_in_dump_order(self):
+        events = [Event() for _ in range(4)]
+        for e in events:
+            e._restore_timestamp(1.0)
+
+        dump(EventPool('events', *events), self.path)
+
+        with load(self.path, lazy = True) as mapped:
+            self.assertIsInstance(mapped, MappedContainer)
+            self.assertEqual(len(mapped), 4)
+            last, first = mapped[3], mapped[0]
+            self.assertLess(first.sequence, last.sequence)
+            self.assertEqual(
+                [e.id for e in sorted(mapped)],
+                [e.id for e in reversed(events)])
+            self.assertEqual(mapped.get(id = events[1].id).id, events[1].id)
+
+    def test_hard_key_set(self):
+        keys = [[i] for i in range(3)]
+        keyset = HardKeySet()
+        for k in keys:
+            keyset[k] = {'value': k[0]}
+
+        dump(keyset, self.path)
+        loaded = load(self.path)
+        self.assertIs(type(loaded), HardKeySet)
+        self.assertEqual(sorted(loaded, key = repr), sorted(keyset, key = repr))
+
+    def test_rejects_weak_pools_and_other_files(self):
+        with self.assertRaises(TypeError):
+            dump(WeakItemPool(), self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(bytes(64))
+
+        with self.assertRaises(ValueError):
+            load(self.path)
+
+
+class TestSharedItemPool(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = SharedItemPool(
+            'pyarchy_test_%i' % os.getpid(),
+            shards = 2,
+            shard_size = 4096)
+        self.reader = SharedItemPool(self.writer.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+        self.writer.unlink()
+
+    def test_add_stores_each_object_once(self):
+        for _ in range(3):
+            self.writer.add(('a', 1))
+
+        self.writer.add(('b', 2))
+        self.assertEqual(sorted(self.reader), [('a', 1), ('b', 2)])
+        self.assertEqual(len(self.reader), 2)
+
+    def test_remove(self):
+        self.writer.add(1)
+        self.writer.add(2)
+        self.writer.remove(1)
+        self.assertEqual(list(self.reader), [2])
+
+        with self.assertRaises(KeyError):
+            self.writer.remove(1)
+
+        with self.assertRaises(UserWarning):
+            self.reader.add(3)
+
+    def test_churn_reuses_deleted_space(self):
+        live = set()
+        rand = random.Random(0)
+
+        for _ in range(3000):
+            value = rand.randrange(200)
+            if value in live:
+                self.writer.remove(value)
+                live.discard(value)
+            else:
+                self.writer.add(value)
+                live.add(value)
+
+        self.assertEqual(sorted(self.reader), sorted(live))
+        self.assertEqual(len(self.reader), len(live))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+
+from pyarchy.mechanical import RotarySwitch, StateHistory, StateMachine
+from pyarchy.mechanical import SwitchBank, Transition
+
+
+class Door(StateMachine):
+
+    states = ('closed', 'open', 'locked')
+    transitions = (
+        Transition('open', 'closed', 'open', 'is_unlocked'),
+        Transition('close', 'open', 'closed'),
+        Transition('lock', 'closed', 'locked'),
+        Transition('unlock', 'locked', 'closed'),
+        Transition('slam', '*', 'closed'),
+    )
+
+    def __init__(self, unlocked = True):
+        StateMachine.__init__(self)
+        self.log = []
+        self.unlocked = unlocked
+
+    def is_unlocked(self):
+        return self.unlocked
+
+    def on_enter_open(self):
+        self.log.append('enter open')
+
+    def on_exit_open(self):
+        self.log.append('exit open')
+
+    def on_exit_locked(self):
+        # Setting the state directly from a hook.
+        self.state = 'open'
+
+
+class TestStateHistory(unittest.TestCase):
+
+    def changes(self, history):
+        return [r[1:] for r in history]
+
+    def test_tables_are_bounded(self):
+        switch = RotarySwitch(10000)
+        switch.record_history(4)
+        for position in range(1, 10001):
+            switch.state = position
+
+        history = switch.history
+        self.assertEqual(
+            self.changes(history),
+            [(9996, 9997), (9997, 9998), (9998, 9999), (9999, 10000)])
+        self.assertLessEqual(len(history._StateHistory__states), 8)
+
+        history.clear()
+        self.assertEqual(self.changes(history), [])
+        self.assertEqual(history._StateHistory__states, [])
+
+    def test_equal_states_of_different_types(self):
+        history = StateHistory(2)
+        for old, new in [(0, 1), (1, True), (True, 1.0), (1.0, False)]:
+            history.record(old, new)
+
+        self.assertEqual(
+            [(type(o), type(n)) for o, n in self.changes(history)],
+            [(bool, float), (float, bool)])
+
+    def test_unhashable_states_are_copied(self):
+        history = StateHistory(2)
+        state = [1]
+        history.record(state, [2])
+        state.append(3)
+        history.record([2], state)
+
+        self.assertEqual(
+            self.changes(history),
+            [([1], [2]), ([2], [1, 3])])
+
+
+class TestSwitchBank(unittest.TestCase):
+
+    def test_set_accepts_generator_indices(self):
+        bank = SwitchBank(RotarySwitch, 5, 9)
+        bank.set((i for i in range(3)), [4, 5, 6])
+        bank.set((i for i in (3, 4)), 2)
+        self.assertEqual(bank.states(), [4, 5, 6, 2, 2])
+
+        with self.assertRaises(ValueError):
+            bank.set((i for i in range(3)), [1])
+
+    def test_wrapping_set_matches_rotary_switch(self):
+        bank = SwitchBank(RotarySwitch, 1, 3, wrapping = True)
+        switch = RotarySwitch(3, wrapping = True)
+
+        for position in (7, -2, 2):
+            bank[0].state = switch.state = position
+            self.assertEqual(bank[0].state, switch.state)
+
+
+class TestStateMachine(unittest.TestCase):
+
+    def make_doors(self):
+        doors = [Door(unlocked = i % 3 != 0) for i in range(6)]
+        for door in doors:
+            door.record_history(8)
+
+        doors[1].state = 'open'
+        doors[2].state = 'locked'
+        return doors
+
+    def test_fire_batch_matches_fire(self):
+        for event in ('open', 'close', 'lock', 'unlock', 'slam'):
+            fired, batched = self.make_doors(), self.make_doors()
+
+            expected = bytearray(d.fire(event) for d in fired)
+            self.assertEqual(Door.fire_batch(batched, event), expected)
+
+            for a, b in zip(fired, batched):
+                self.assertEqual(a.state, b.state)
+                self.assertEqual(a.log, b.log)
+                self.assertEqual(
+                    [r[1:] for r in a.history],
+                    [r[1:] for r in b.history])
+
+    def test_fire_batch_per_machine_events(self):
+        fired, batched = self.make_doors(), self.make_doors()
+        events = ['open', 'close', 'unlock', 'open', 'lock', 'slam']
+
+        expected = bytearray(d.fire(e) for d, e in zip(fired, events))
+        self.assertEqual(Door.fire_batch(batched, events), expected)
+        self.assertEqual(
+            [d.state for d in fired],
+            [d.state for d in batched])
+
+        with self.assertRaises(ValueError):
+            Door.fire_batch(batched, events[:2])
+
+    def test_fire_batch_rejects_other_types(self):
+        with self.assertRaises(TypeError):
+            Door.fire_batch([Door(), RotarySwitch()], 'open')
+
+        with self.assertRaises(TypeError):
+            StateMachine.fire_batch([], 'open')
+
+        with self.assertRaises(KeyError):
+            Door.fire_batch([Door()], 'kick')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import threading
+import time
+import unittest
+
+from pyarchy.core import MultitonObject, SingletonObject
+
+
+class SlowLock(object):
+    """
+    An RLock which makes the building thread sleep before each acquire,
+    widening the gaps between its locked blocks.
+    """
+
+    def __init__(self, delay):
+        self.__lock = threading.RLock()
+        self.__delay = delay
+        self.builder = None
+
+    def __enter__(self):
+        if threading.get_ident() == self.builder:
+            time.sleep(self.__delay)
+
+        self.__lock.acquire()
+
+    def __exit__(self, *exc_info):
+        self.__lock.release()
+
+
+class TestMetaSingleton(unittest.TestCase):
+
+    def test_constructor_can_wait_on_another_singleton(self):
+        class Inner(SingletonObject):
+            pass
+
+        class Outer(SingletonObject):
+            def __init__(self):
+                thread = threading.Thread(target = Inner)
+                thread.start()
+                thread.join(1)
+                self.deadlocked = thread.is_alive()
+
+        self.assertFalse(Outer().deadlocked)
+        self.assertIs(Inner(), Inner())
+
+    def test_concurrent_calls_make_one_instance(self):
+        built = []
+
+        class Slow(SingletonObject):
+            def __init__(self):
+                built.append(self)
+                time.sleep(0.01)
+
+        results = []
+        threads = [
+            threading.Thread(target = lambda: results.append(Slow()))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(built), 1)
+        self.assertTrue(all(r is built[0] for r in results))
+
+
+class TestMetaMultiton(unittest.TestCase):
+
+    def test_concurrent_calls_build_each_key_once(self):
+        built = []
+        lock = SlowLock(0.01)
+
+        class Slow(MultitonObject):
+            def __init__(self, key):
+                built.append(key)
+                lock.builder = threading.get_ident()
+                time.sleep(0.005)
+
+        Slow._MetaMultiton__lock = lock
+
+        results = []
+
+        def call(delay):
+            time.sleep(delay)
+            results.append(Slow('a'))
+
+        # Callers arrive throughout the build and the gaps around it.
+        threads = [
+            threading.Thread(target = call, args = (i * 0.002,))
+            for i in range(16)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(built, ['a'])
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(Slow.cache_info().misses, 1)
+
+    def test_failed_build_is_retried(self):
+        attempts = []
+
+        class Flaky(MultitonObject):
+            def __init__(self, key):
+                attempts.append(key)
+                if len(attempts) == 1:
+                    raise RuntimeError('first build fails')
+
+        with self.assertRaises(RuntimeError):
+            Flaky('a')
+
+        self.assertIs(Flaky('a'), Flaky('a'))
+        self.assertEqual(attempts, ['a', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()